@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Shared JSON I/O helpers for the archived layout scripts.
+
+Every script in this directory imports these instead of carrying its own
+copy, so loading, saving, neptune/ discovery and the per-file worker pool
+only need to be changed in one place. The scripts are run directly, which puts this directory on
+sys.path for the import.
+"""
+
+import json
+import sys
+import os
+import io
+from contextlib import redirect_stdout
+from functools import partial
+from multiprocessing import Pool
+from typing import Callable, Dict, Any, List, Optional, Tuple, Iterator
+
+try:
+    import orjson  # Optional: faster parsing; output is still written by json
+except ImportError:
+    orjson = None
+
+# Layout files processed when no paths are given, next to the scripts
+NEPTUNE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "neptune")
+
+
+def load_file_bytes(file_path: str) -> bytes:
+    """Load the raw bytes of a layout file; both parsers decode UTF-8 themselves."""
+    try:
+        with open(file_path, 'rb') as f:
+            return f.read()
+    except FileNotFoundError:
+        print(f"Error: File '{file_path}' not found.")
+        sys.exit(1)
+
+
+def parse_json_bytes(file_path: str, content: bytes) -> Dict[str, Any]:
+    """
+    Parse JSON bytes previously loaded from file_path, preserving key order.
+
+    Parses with orjson when it is installed (its JSONDecodeError subclasses
+    json's), otherwise with the standard library.
+    """
+    try:
+        return orjson.loads(content) if orjson is not None else json.loads(content)
+    except json.JSONDecodeError as e:
+        print(f"Error: Invalid JSON in file '{file_path}': {e}")
+        sys.exit(1)
+
+
+def read_existing_bytes(file_path: str) -> Optional[bytes]:
+    """Read the current bytes of a file about to be saved, or None if it can't be read."""
+    try:
+        with open(file_path, 'rb') as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def save_json_file(file_path: str, data: Dict[str, Any],
+                   original_content: Optional[bytes] = None) -> None:
+    """
+    Save data to a JSON file with proper formatting.
+
+    original_content is the file's bytes as loaded, if the caller still has
+    them; otherwise the current file is read back to check for a no-op write.
+
+    The payload goes to a sibling temporary file that is then renamed over the
+    original, so an interrupted save never leaves a truncated layout behind.
+    """
+    tmp_path = file_path + ".tmp"
+    try:
+        # Serialize up front so the file is written in one call rather than
+        # the many small chunks json.dump streams out
+        payload = json.dumps(data, indent='\t', ensure_ascii=False)
+
+        # Leave the file untouched when it already holds exactly this output
+        if original_content is None:
+            original_content = read_existing_bytes(file_path)
+        if original_content == payload.encode('utf-8'):
+            print(f"  Unchanged on disk, not rewritten: {file_path}")
+            return
+
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(payload)
+        os.replace(tmp_path, file_path)
+        print(f"  Saved: {file_path}")
+    except Exception as e:
+        print(f"Error saving file: {e}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        sys.exit(1)
+
+
+def find_neptune_json_files() -> List[str]:
+    """Find all JSON files in the neptune/ directory."""
+    if not os.path.isdir(NEPTUNE_DIR):
+        print(f"Error: neptune/ directory not found at {NEPTUNE_DIR}")
+        sys.exit(1)
+
+    # A single scandir pass; like glob's "*.json", skip hidden files
+    with os.scandir(NEPTUNE_DIR) as entries:
+        return sorted(
+            entry.path for entry in entries
+            if entry.name.endswith(".json") and not entry.name.startswith(".")
+            and entry.is_file()
+        )
+
+
+def process_file_worker(process_file: Callable[[str, bool], Dict[str, Any]],
+                        file_path: str, dry_run: bool) -> Tuple[str, Optional[Dict[str, Any]]]:
+    """
+    Run process_file in a pool worker with its output captured.
+
+    Returns the captured report and the stats, so the parent can print each
+    file's report in one piece. Stats are None if process_file exited on an error.
+    """
+    buffer = io.StringIO()
+    with redirect_stdout(buffer):
+        try:
+            stats = process_file(file_path, dry_run)
+        except SystemExit:
+            stats = None
+    return buffer.getvalue(), stats
+
+
+def process_files(process_file: Callable[[str, bool], Dict[str, Any]],
+                  files_to_process: List[str], dry_run: bool) -> Iterator[Dict[str, Any]]:
+    """
+    Run a script's process_file over each file, using a process pool when there is more than one.
+
+    Yields the stats for each file in input order, after its report is printed.
+    Each worker reads, processes and writes its own file, so files spread
+    across cores. process_file must be a module-level function so the pool
+    can pickle it.
+    """
+    if len(files_to_process) <= 1:
+        for file_path in files_to_process:
+            yield process_file(file_path, dry_run)
+        return
+
+    worker = partial(process_file_worker, process_file, dry_run=dry_run)
+    with Pool(min(len(files_to_process), os.cpu_count() or 1)) as pool:
+        for output, stats in pool.imap(worker, files_to_process):
+            print(output, end="")
+            if stats is None:
+                sys.exit(1)
+            yield stats
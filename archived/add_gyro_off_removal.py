@@ -24,14 +24,17 @@ Usage:
     python3 add_gyro_off_removal.py file.json --dry-run
 """
 
-import json
 import sys
 import os
-import glob
+import re
 import argparse
-from collections import OrderedDict
+from functools import lru_cache
 from typing import Dict, Any, List, Tuple
 
+from _jsonio import (
+    load_file_bytes, parse_json_bytes, save_json_file, find_neptune_json_files, process_files
+)
+
 # Ramp Up layers that trigger the Gyro Off removal
 RAMP_UP_LAYERS = [
     "{{Base::Turning Ramp Up 0}}",
@@ -43,48 +46,37 @@ RAMP_UP_LAYERS = [
 # The Gyro Off layer to add removal for
 GYRO_OFF_LAYER = "{{Base::Gyro Off}}"
 GYRO_OFF_REMOVAL = f"controller_action remove_layer {GYRO_OFF_LAYER} 0 0, , "
+GYRO_OFF_REMOVAL_NEEDLE = f"controller_action remove_layer {GYRO_OFF_LAYER}"
 
+# Literal prefix shared by all Ramp Up removals; a plain substring test rules
+# out most bindings faster than running the regex
+BASE_REMOVE_LAYER_PREFIX = "controller_action remove_layer {{Base::"
 
-def load_json_file(file_path: str) -> Dict[str, Any]:
-    """Load and parse a JSON file, preserving key order."""
-    try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            return json.load(f, object_pairs_hook=OrderedDict)
-    except FileNotFoundError:
-        print(f"Error: File '{file_path}' not found.")
-        sys.exit(1)
-    except json.JSONDecodeError as e:
-        print(f"Error: Invalid JSON in file '{file_path}': {e}")
-        sys.exit(1)
-
+# Single alternation over all Ramp Up removals, compiled once at import
+RAMP_UP_REMOVAL_RE = re.compile(
+    "controller_action remove_layer (?:"
+    + "|".join(re.escape(layer) for layer in RAMP_UP_LAYERS)
+    + ")"
+)
 
-def save_json_file(file_path: str, data: Dict[str, Any]) -> None:
-    """Save data to a JSON file with proper formatting."""
-    try:
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent='\t', ensure_ascii=False)
-        print(f"  Saved: {file_path}")
-    except Exception as e:
-        print(f"Error saving file: {e}")
-        sys.exit(1)
+# Same pattern over raw file bytes, for pre-scanning a layout before it is parsed
+RAMP_UP_REMOVAL_BYTES_RE = re.compile(RAMP_UP_REMOVAL_RE.pattern.encode())
 
 
+@lru_cache(maxsize=4096)
 def contains_ramp_up_removal(binding: str) -> bool:
     """
     Check if a binding string contains a controller_action remove_layer for any Ramp Up layer.
+    
+    Memoized: layouts repeat the same binding strings across many groups, and
+    the answer only depends on the string and the module-level RAMP_UP_LAYERS.
     """
-    for ramp_up_layer in RAMP_UP_LAYERS:
-        if f"controller_action remove_layer {ramp_up_layer}" in binding:
-            return True
-    return False
+    return BASE_REMOVE_LAYER_PREFIX in binding and RAMP_UP_REMOVAL_RE.search(binding) is not None
 
 
 def contains_gyro_off_removal(bindings: List[str]) -> bool:
     """Check if the Gyro Off removal already exists in the bindings list."""
-    for binding in bindings:
-        if f"controller_action remove_layer {GYRO_OFF_LAYER}" in binding:
-            return True
-    return False
+    return any(GYRO_OFF_REMOVAL_NEEDLE in binding for binding in bindings)
 
 
 def find_insertion_index(bindings: List[str]) -> int:
@@ -137,39 +129,39 @@ def process_binding_value(binding_value: Any) -> Tuple[Any, int]:
     return binding_value, additions
 
 
-def process_object(obj: Any, stats: Dict[str, int]) -> Any:
+def process_object(obj: Any) -> Tuple[int, int]:
     """
-    Recursively process a JSON object, looking for 'binding' keys inside 'bindings' objects.
+    Walk a JSON object, looking for 'binding' keys inside 'bindings' objects.
+    
+    Uses an explicit stack rather than recursion. Bindings are updated in place;
+    containers are only touched when a binding actually gains a Gyro Off removal.
     
     Args:
         obj: The object to process
-        stats: Dictionary to track statistics
     
     Returns:
-        The processed object with Gyro Off removals added
+        Tuple of (count_of_additions, count_of_bindings_modified)
     """
-    if isinstance(obj, dict):
-        new_obj = OrderedDict() if isinstance(obj, OrderedDict) else {}
-        
-        for key, value in obj.items():
-            if key == "binding" and isinstance(value, (str, list)):
-                # Found a binding - process it
-                new_value, additions = process_binding_value(value)
-                new_obj[key] = new_value
-                stats["additions"] += additions
-                if additions > 0:
-                    stats["bindings_modified"] += 1
-            else:
-                # Recurse into nested objects
-                new_obj[key] = process_object(value, stats)
-        
-        return new_obj
+    total_additions = 0
+    bindings_modified = 0
+    stack = [obj]
+    while stack:
+        current = stack.pop()
+        if isinstance(current, dict):
+            for key, value in current.items():
+                if key == "binding" and isinstance(value, (str, list)):
+                    # Found a binding - process it
+                    new_value, additions = process_binding_value(value)
+                    if additions > 0:
+                        current[key] = new_value
+                        total_additions += additions
+                        bindings_modified += 1
+                elif isinstance(value, (dict, list)):
+                    stack.append(value)
+        elif isinstance(current, list):
+            stack.extend(current)
     
-    elif isinstance(obj, list):
-        return [process_object(item, stats) for item in obj]
-    
-    else:
-        return obj
+    return total_additions, bindings_modified
 
 
 def process_file(file_path: str, dry_run: bool = False) -> Dict[str, int]:
@@ -185,17 +177,21 @@ def process_file(file_path: str, dry_run: bool = False) -> Dict[str, int]:
     """
     print(f"\nProcessing: {file_path}")
     
-    # Load the file
-    data = load_json_file(file_path)
-    
     # Track statistics
     stats = {
         "additions": 0,
         "bindings_modified": 0
     }
     
-    # Process the data
-    processed_data = process_object(data, stats)
+    # Load the file, only parsing it when a Ramp Up removal appears in the raw text
+    content = load_file_bytes(file_path)
+    if RAMP_UP_REMOVAL_BYTES_RE.search(content) is None:
+        print(f"  No changes needed (Gyro Off removals may already exist or no Ramp Up removals found)")
+        return stats
+    data = parse_json_bytes(file_path, content)
+    
+    # Process the data in place
+    stats["additions"], stats["bindings_modified"] = process_object(data)
     
     # Report results
     if stats["additions"] > 0:
@@ -205,26 +201,13 @@ def process_file(file_path: str, dry_run: bool = False) -> Dict[str, int]:
         if dry_run:
             print(f"  [DRY RUN] Would save changes to: {file_path}")
         else:
-            save_json_file(file_path, processed_data)
+            save_json_file(file_path, data, content)
     else:
         print(f"  No changes needed (Gyro Off removals may already exist or no Ramp Up removals found)")
     
     return stats
 
 
-def find_neptune_json_files() -> List[str]:
-    """Find all JSON files in the neptune/ directory."""
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    neptune_dir = os.path.join(script_dir, "neptune")
-    
-    if not os.path.isdir(neptune_dir):
-        print(f"Error: neptune/ directory not found at {neptune_dir}")
-        sys.exit(1)
-    
-    json_files = glob.glob(os.path.join(neptune_dir, "*.json"))
-    return sorted(json_files)
-
-
 def main():
     parser = argparse.ArgumentParser(
         description="Add Gyro Off removal actions to Steam Input layout files"
@@ -271,8 +254,7 @@ def main():
         "total_additions": 0
     }
     
-    for file_path in files_to_process:
-        stats = process_file(file_path, args.dry_run)
+    for stats in process_files(process_file, files_to_process, args.dry_run):
         total_stats["files_processed"] += 1
         if stats["additions"] > 0:
             total_stats["files_modified"] += 1
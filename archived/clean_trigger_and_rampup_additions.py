@@ -12,13 +12,15 @@ Usage:
     python3 clean_trigger_and_rampup_additions.py --dry-run          # Preview changes without modifying
 """
 
-import json
 import sys
 import os
-import glob
+import re
 import argparse
-from collections import OrderedDict
-from typing import Dict, Any, List, Tuple, Set, Optional
+from typing import Dict, Any, List, Tuple, Set, FrozenSet, Optional, Pattern
+
+from _jsonio import (
+    load_file_bytes, parse_json_bytes, save_json_file, find_neptune_json_files, process_files
+)
 
 # Trigger layers for default layout (L2/R2 as triggers)
 DEFAULT_TRIGGER_LAYERS = [
@@ -46,70 +48,53 @@ RAMP_UP_VARIANTS = [
 
 GYRO_OFF_LAYER = "{{Base::Gyro Off}}"
 
-# Removal commands to add when adding trigger layers
-def get_trigger_cleanup_removals() -> List[str]:
-    """Get the removal commands to add when adding trigger layers."""
-    removals = []
-    # Remove Gyro Off
-    removals.append(f"controller_action remove_layer {GYRO_OFF_LAYER} 0 0, , ")
-    # Remove all Ramp Up variants
-    for variant in RAMP_UP_VARIANTS:
-        removals.append(f"controller_action remove_layer {variant} 0 0, , ")
-    return removals
+# Removal commands to add when adding trigger layers: Gyro Off, then all Ramp Up variants
+TRIGGER_CLEANUP_REMOVALS = (
+    f"controller_action remove_layer {GYRO_OFF_LAYER} 0 0, , ",
+    *(f"controller_action remove_layer {variant} 0 0, , " for variant in RAMP_UP_VARIANTS),
+)
 
 # Add Gyro Off command
 GYRO_OFF_ADD = f"controller_action add_layer {GYRO_OFF_LAYER} 0 0, , "
+GYRO_OFF_ADD_NEEDLE = f"add_layer {GYRO_OFF_LAYER}"
 
 
-def load_json_file(file_path: str) -> Dict[str, Any]:
-    """Load and parse a JSON file, preserving key order."""
-    try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            return json.load(f, object_pairs_hook=OrderedDict)
-    except FileNotFoundError:
-        print(f"Error: File '{file_path}' not found.")
-        sys.exit(1)
-    except json.JSONDecodeError as e:
-        print(f"Error: Invalid JSON in file '{file_path}': {e}")
-        sys.exit(1)
+def compile_add_layer_pattern(layers: List[str]) -> Pattern[str]:
+    """Compile a single alternation matching an add_layer for any of the layers."""
+    return re.compile(
+        "controller_action add_layer (?:"
+        + "|".join(re.escape(layer) for layer in layers)
+        + ")"
+    )
 
 
-def save_json_file(file_path: str, data: Dict[str, Any]) -> None:
-    """Save data to a JSON file with proper formatting."""
-    try:
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent='\t', ensure_ascii=False)
-        print(f"  Saved: {file_path}")
-    except Exception as e:
-        print(f"Error saving file: {e}")
-        sys.exit(1)
+# Literal prefix shared by every pattern below; a plain substring test rules
+# out most bindings faster than running the regex
+BASE_ADD_LAYER_PREFIX = "controller_action add_layer {{Base::"
 
+# Patterns compiled once at import so each check is a single regex search
+DEFAULT_TRIGGER_ADD_RE = compile_add_layer_pattern(DEFAULT_TRIGGER_LAYERS)
+ALTERNATIVE_TRIGGER_ADD_RE = compile_add_layer_pattern(ALTERNATIVE_TRIGGER_LAYERS)
+RAMP_UP_ADD_RE = compile_add_layer_pattern(RAMP_UP_VARIANTS)
 
-def is_alternative_layout(file_path: str) -> bool:
-    """Check if the file is an alternative layout."""
-    return "alternative" in os.path.basename(file_path).lower()
+# Same patterns over raw file bytes, for pre-scanning a layout before it is parsed
+DEFAULT_TRIGGER_ADD_BYTES_RE = re.compile(DEFAULT_TRIGGER_ADD_RE.pattern.encode())
+ALTERNATIVE_TRIGGER_ADD_BYTES_RE = re.compile(ALTERNATIVE_TRIGGER_ADD_RE.pattern.encode())
+RAMP_UP_ADD_BYTES_RE = re.compile(RAMP_UP_ADD_RE.pattern.encode())
 
 
-def contains_trigger_layer_add(binding: str, trigger_layers: List[str]) -> bool:
+def contains_trigger_layer_add(binding: str, trigger_pattern: Pattern[str]) -> bool:
     """Check if a binding adds a trigger layer."""
-    for layer in trigger_layers:
-        if f"controller_action add_layer {layer}" in binding:
-            return True
-    return False
+    return BASE_ADD_LAYER_PREFIX in binding and trigger_pattern.search(binding) is not None
 
 
 def contains_ramp_up_add(binding: str) -> bool:
     """Check if a binding adds a Turning Ramp Up layer."""
-    for variant in RAMP_UP_VARIANTS:
-        if f"controller_action add_layer {variant}" in binding:
-            return True
-    return False
+    return BASE_ADD_LAYER_PREFIX in binding and RAMP_UP_ADD_RE.search(binding) is not None
 
 
-def get_base_preset_groups(data: Dict) -> Set[str]:
+def get_base_preset_groups(data: Dict) -> FrozenSet[str]:
     """Get the group IDs that belong to the Base preset."""
-    base_groups = set()
-    
     # Data is nested under controller_mappings
     cm = data.get("controller_mappings", data)
     
@@ -117,12 +102,9 @@ def get_base_preset_groups(data: Dict) -> Set[str]:
     presets = cm.get("preset", [])
     for preset in presets:
         if preset.get("name") == "Preset_1000001":  # Base preset
-            group_bindings = preset.get("group_source_bindings", {})
-            for group_id in group_bindings.keys():
-                base_groups.add(group_id)
-            break
+            return frozenset(preset.get("group_source_bindings", {}))
     
-    return base_groups
+    return frozenset()
 
 
 def binding_list_contains(bindings: List[str], action: str) -> bool:
@@ -136,30 +118,25 @@ def binding_list_contains(bindings: List[str], action: str) -> bool:
 
 def remove_duplicates_preserve_order(bindings: List[str]) -> List[str]:
     """Remove duplicate bindings while preserving order."""
-    seen = set()
-    result = []
+    # Keyed by the stripped form; the first variant seen is the one kept
+    unique = {}
     for binding in bindings:
-        normalized = binding.strip()
-        if normalized not in seen:
-            seen.add(normalized)
-            result.append(binding)
-    return result
+        unique.setdefault(binding.strip(), binding)
+    return list(unique.values())
 
 
 def process_binding_for_trigger_add(
     binding_value: Any,
-    trigger_layers: List[str],
+    trigger_pattern: Pattern[str],
     stats: Dict[str, int]
 ) -> Tuple[Any, bool]:
     """
     Process a binding to add cleanup when adding trigger layers.
     """
-    cleanup_removals = get_trigger_cleanup_removals()
-    
     if isinstance(binding_value, str):
-        if contains_trigger_layer_add(binding_value, trigger_layers):
+        if contains_trigger_layer_add(binding_value, trigger_pattern):
             # Convert to array with cleanup actions first
-            new_bindings = list(cleanup_removals)
+            new_bindings = list(TRIGGER_CLEANUP_REMOVALS)
             new_bindings.append(binding_value)
             new_bindings = remove_duplicates_preserve_order(new_bindings)
             stats["trigger_adds_modified"] += 1
@@ -168,28 +145,25 @@ def process_binding_for_trigger_add(
     
     elif isinstance(binding_value, list):
         has_trigger_add = any(
-            contains_trigger_layer_add(b, trigger_layers)
+            contains_trigger_layer_add(b, trigger_pattern)
             for b in binding_value if isinstance(b, str)
         )
         
         if not has_trigger_add:
             return binding_value, False
         
-        # Check what's missing
-        new_bindings = list(binding_value)
-        modified = False
-        
-        for removal in cleanup_removals:
-            if not binding_list_contains(new_bindings, removal.strip().rstrip(", , ")):
-                # Insert at beginning
-                new_bindings.insert(0, removal)
-                modified = True
+        # Check what's missing; missing removals are prepended in reverse cleanup order
+        missing_removals = [
+            removal for removal in reversed(TRIGGER_CLEANUP_REMOVALS)
+            if not binding_list_contains(binding_value, removal.strip().rstrip(", , "))
+        ]
         
-        if modified:
-            new_bindings = remove_duplicates_preserve_order(new_bindings)
-            stats["trigger_adds_modified"] += 1
+        if not missing_removals:
+            return binding_value, False
         
-        return new_bindings, modified
+        new_bindings = remove_duplicates_preserve_order(missing_removals + binding_value)
+        stats["trigger_adds_modified"] += 1
+        return new_bindings, True
     
     return binding_value, False
 
@@ -204,7 +178,7 @@ def process_binding_for_rampup_add(
     if isinstance(binding_value, str):
         if contains_ramp_up_add(binding_value):
             # Check if Gyro Off add is already there
-            if f"add_layer {GYRO_OFF_LAYER}" in binding_value:
+            if GYRO_OFF_ADD_NEEDLE in binding_value:
                 return binding_value, False
             # Convert to array with Gyro Off add
             new_bindings = [GYRO_OFF_ADD, binding_value]
@@ -213,24 +187,22 @@ def process_binding_for_rampup_add(
         return binding_value, False
     
     elif isinstance(binding_value, list):
-        has_ramp_up_add = any(
-            contains_ramp_up_add(b)
-            for b in binding_value if isinstance(b, str)
-        )
+        # Single pass: look for a Ramp Up add and bail out as soon as a Gyro Off add is seen
+        has_ramp_up_add = False
+        for b in binding_value:
+            if not isinstance(b, str):
+                continue
+            if GYRO_OFF_ADD_NEEDLE in b:
+                return binding_value, False
+            if not has_ramp_up_add and contains_ramp_up_add(b):
+                has_ramp_up_add = True
         
         if not has_ramp_up_add:
             return binding_value, False
         
-        # Check if Gyro Off add is already there
-        has_gyro_off_add = any(
-            f"add_layer {GYRO_OFF_LAYER}" in b
-            for b in binding_value if isinstance(b, str)
-        )
-        
-        if has_gyro_off_add:
-            return binding_value, False
-        
-        # Add Gyro Off add at the beginning
+        # Add Gyro Off add at the beginning. The scan above proved it is not
+        # already present, but the dedup stays: it also collapses duplicates
+        # that were already in binding_value.
         new_bindings = [GYRO_OFF_ADD] + list(binding_value)
         new_bindings = remove_duplicates_preserve_order(new_bindings)
         stats["rampup_adds_modified"] += 1
@@ -276,7 +248,7 @@ def is_trigger_click_in_base(
 
 def process_activator_for_trigger(
     activator: Any,
-    trigger_layers: List[str],
+    trigger_pattern: Pattern[str],
     stats: Dict[str, int]
 ) -> bool:
     """Process a single activator for trigger layer additions."""
@@ -286,7 +258,7 @@ def process_activator_for_trigger(
         if "binding" in bindings_obj:
             new_binding, was_modified = process_binding_for_trigger_add(
                 bindings_obj["binding"],
-                trigger_layers,
+                trigger_pattern,
                 stats
             )
             if was_modified:
@@ -299,7 +271,7 @@ def process_activator_for_trigger(
                 if "binding" in bindings_obj:
                     new_binding, was_modified = process_binding_for_trigger_add(
                         bindings_obj["binding"],
-                        trigger_layers,
+                        trigger_pattern,
                         stats
                     )
                     if was_modified:
@@ -309,31 +281,25 @@ def process_activator_for_trigger(
 
 
 def process_groups(
-    groups: List[Dict],
-    base_groups: Set[str],
-    trigger_layers: List[str],
+    base_group_objs: List[Dict],
+    trigger_pattern: Pattern[str],
     stats: Dict[str, int]
 ) -> bool:
-    """Process groups array and modify bindings as needed."""
+    """Process the Base preset's groups and modify bindings as needed."""
     modified = False
     
-    for group in groups:
-        group_id = group.get("id")
+    for group in base_group_objs:
         group_mode = group.get("mode")
         
         inputs = group.get("inputs", {})
         
-        # Skip if not a base group
-        if group_id not in base_groups:
-            continue
-        
         # Process trigger click bindings (for default layout - trigger mode)
         if group_mode == "trigger":
             click_input = inputs.get("click", {})
             activators = click_input.get("activators", {})
             
             for activator_name, activator in activators.items():
-                if process_activator_for_trigger(activator, trigger_layers, stats):
+                if process_activator_for_trigger(activator, trigger_pattern, stats):
                     modified = True
         
         # Process switches mode groups for bumper inputs (for alternative layout)
@@ -344,7 +310,7 @@ def process_groups(
                 activators = bumper_input.get("activators", {})
                 
                 for activator_name, activator in activators.items():
-                    if process_activator_for_trigger(activator, trigger_layers, stats):
+                    if process_activator_for_trigger(activator, trigger_pattern, stats):
                         modified = True
         
         # Process edge/Soft_Press bindings for joystick groups (for adding Ramp Up)
@@ -384,29 +350,37 @@ def process_file(file_path: str, dry_run: bool = False) -> Dict[str, int]:
     print(f"\nProcessing: {file_path}")
     
     # Determine layout type
-    is_alt = is_alternative_layout(file_path)
+    basename_lower = os.path.basename(file_path).lower()
+    is_alt = "alternative" in basename_lower
     trigger_layers = ALTERNATIVE_TRIGGER_LAYERS if is_alt else DEFAULT_TRIGGER_LAYERS
+    trigger_pattern = ALTERNATIVE_TRIGGER_ADD_RE if is_alt else DEFAULT_TRIGGER_ADD_RE
+    trigger_bytes_pattern = ALTERNATIVE_TRIGGER_ADD_BYTES_RE if is_alt else DEFAULT_TRIGGER_ADD_BYTES_RE
     layout_type = "alternative" if is_alt else "default"
     print(f"  Layout type: {layout_type}")
     print(f"  Trigger layers: {', '.join([l.split('::')[1].rstrip('}}') for l in trigger_layers])}")
     
-    # Load the file
-    data = load_json_file(file_path)
-    
-    # Get Base preset groups
-    base_groups = get_base_preset_groups(data)
-    print(f"  Base preset groups: {len(base_groups)} groups")
-    
     # Track statistics
     stats = {
         "trigger_adds_modified": 0,
         "rampup_adds_modified": 0
     }
     
+    # Load the file, only parsing it when a trigger or Ramp Up add appears in the raw text
+    content = load_file_bytes(file_path)
+    if trigger_bytes_pattern.search(content) is None and RAMP_UP_ADD_BYTES_RE.search(content) is None:
+        print(f"  No changes needed")
+        return stats
+    data = parse_json_bytes(file_path, content)
+    
+    # Get Base preset groups
+    base_groups = get_base_preset_groups(data)
+    print(f"  Base preset groups: {len(base_groups)} groups")
+    
     # Process groups (nested under controller_mappings, key is "group" singular)
     cm = data.get("controller_mappings", data)
     groups = cm.get("group", [])
-    modified = process_groups(groups, base_groups, trigger_layers, stats)
+    base_group_objs = [group for group in groups if group.get("id") in base_groups]
+    modified = process_groups(base_group_objs, trigger_pattern, stats)
     
     # Report results
     total_changes = stats["trigger_adds_modified"] + stats["rampup_adds_modified"]
@@ -417,26 +391,13 @@ def process_file(file_path: str, dry_run: bool = False) -> Dict[str, int]:
         if dry_run:
             print(f"  [DRY RUN] Would save changes to: {file_path}")
         else:
-            save_json_file(file_path, data)
+            save_json_file(file_path, data, content)
     else:
         print(f"  No changes needed")
     
     return stats
 
 
-def find_neptune_json_files() -> List[str]:
-    """Find all JSON files in the neptune/ directory."""
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    neptune_dir = os.path.join(script_dir, "neptune")
-    
-    if not os.path.isdir(neptune_dir):
-        print(f"Error: neptune/ directory not found at {neptune_dir}")
-        sys.exit(1)
-    
-    json_files = glob.glob(os.path.join(neptune_dir, "*.json"))
-    return sorted(json_files)
-
-
 def main():
     parser = argparse.ArgumentParser(
         description="Clean up trigger and Ramp Up layer additions in Base set"
@@ -485,8 +446,7 @@ def main():
         "total_rampup_adds_modified": 0
     }
     
-    for file_path in files_to_process:
-        stats = process_file(file_path, args.dry_run)
+    for stats in process_files(process_file, files_to_process, args.dry_run):
         total_stats["files_processed"] += 1
         changes = stats["trigger_adds_modified"] + stats["rampup_adds_modified"]
         if changes > 0:
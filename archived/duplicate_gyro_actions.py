@@ -25,13 +25,16 @@ Usage:
     python3 duplicate_gyro_actions.py file.json --dry-run
 """
 
-import json
 import sys
 import os
-import glob
+import re
 import argparse
-from collections import OrderedDict
-from typing import Dict, Any, List, Tuple
+from functools import lru_cache
+from typing import Dict, Any, Tuple, Optional
+
+from _jsonio import (
+    load_file_bytes, parse_json_bytes, save_json_file, find_neptune_json_files, process_files
+)
 
 # Trigger layer mappings only (modifier layers already processed separately)
 LAYER_MAPPING = {
@@ -46,29 +49,25 @@ LAYER_MAPPING = {
 # Controller action commands that reference layers (only remove_layer)
 CONTROLLER_ACTION_COMMANDS = ['remove_layer']
 
+# Literal prefix shared by every command/layer pair; a plain substring test
+# rules out most bindings faster than running the regex
+MAPPED_ACTION_PREFIX = os.path.commonprefix([
+    f"controller_action {cmd} {layer}"
+    for cmd in CONTROLLER_ACTION_COMMANDS
+    for layer in LAYER_MAPPING
+])
 
-def load_json_file(file_path: str) -> Dict[str, Any]:
-    """Load and parse a JSON file, preserving key order."""
-    try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            return json.load(f, object_pairs_hook=OrderedDict)
-    except FileNotFoundError:
-        print(f"Error: File '{file_path}' not found.")
-        sys.exit(1)
-    except json.JSONDecodeError as e:
-        print(f"Error: Invalid JSON in file '{file_path}': {e}")
-        sys.exit(1)
-
+# One pattern over every command/layer pair, compiled once at import; group 1 is the layer
+CONTROLLER_ACTION_RE = re.compile(
+    "controller_action (?:"
+    + "|".join(re.escape(cmd) for cmd in CONTROLLER_ACTION_COMMANDS)
+    + ") ("
+    + "|".join(re.escape(layer) for layer in LAYER_MAPPING)
+    + ")"
+)
 
-def save_json_file(file_path: str, data: Dict[str, Any]) -> None:
-    """Save data to a JSON file with proper formatting."""
-    try:
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent='\t', ensure_ascii=False)
-        print(f"  Saved: {file_path}")
-    except Exception as e:
-        print(f"Error saving file: {e}")
-        sys.exit(1)
+# Same pattern over raw file bytes, for pre-scanning a layout before it is parsed
+CONTROLLER_ACTION_BYTES_RE = re.compile(CONTROLLER_ACTION_RE.pattern.encode())
 
 
 def is_matching_controller_action(binding: str) -> Tuple[bool, str, str]:
@@ -78,11 +77,11 @@ def is_matching_controller_action(binding: str) -> Tuple[bool, str, str]:
     Returns:
         Tuple of (is_match, original_layer, gyro_layer)
     """
-    for original_layer, gyro_layer in LAYER_MAPPING.items():
-        for cmd in CONTROLLER_ACTION_COMMANDS:
-            if f"controller_action {cmd} {original_layer}" in binding:
-                return True, original_layer, gyro_layer
-    return False, "", ""
+    match = CONTROLLER_ACTION_RE.search(binding) if MAPPED_ACTION_PREFIX in binding else None
+    if match is None:
+        return False, "", ""
+    original_layer = match.group(1)
+    return True, original_layer, LAYER_MAPPING[original_layer]
 
 
 def create_gyro_duplicate(binding: str, original_layer: str, gyro_layer: str) -> str:
@@ -90,9 +89,18 @@ def create_gyro_duplicate(binding: str, original_layer: str, gyro_layer: str) ->
     return binding.replace(original_layer, gyro_layer)
 
 
-def gyro_version_exists(bindings: List[str], gyro_binding: str) -> bool:
-    """Check if the gyro version of a binding already exists in the list."""
-    return gyro_binding in bindings
+@lru_cache(maxsize=4096)
+def gyro_binding_for(binding: str) -> Optional[str]:
+    """
+    Get the gyro duplicate of a binding string, or None if it references no mapped layer.
+    
+    Memoized: the same binding strings recur across groups and files, and the
+    result only depends on the string and the module-level LAYER_MAPPING.
+    """
+    is_match, original_layer, gyro_layer = is_matching_controller_action(binding)
+    if not is_match:
+        return None
+    return create_gyro_duplicate(binding, original_layer, gyro_layer)
 
 
 def process_binding_value(binding_value: Any) -> Tuple[Any, int]:
@@ -104,11 +112,11 @@ def process_binding_value(binding_value: Any) -> Tuple[Any, int]:
     """
     duplicates_added = 0
     
-    if isinstance(binding_value, str):
+    value_type = type(binding_value)
+    if value_type is str:
         # Single string binding
-        is_match, original_layer, gyro_layer = is_matching_controller_action(binding_value)
-        if is_match:
-            gyro_binding = create_gyro_duplicate(binding_value, original_layer, gyro_layer)
+        gyro_binding = gyro_binding_for(binding_value)
+        if gyro_binding is not None:
             # Check if gyro version is already there (shouldn't be for single string, but check anyway)
             if binding_value != gyro_binding:
                 # Convert to array with original + gyro duplicate
@@ -116,19 +124,27 @@ def process_binding_value(binding_value: Any) -> Tuple[Any, int]:
                 return [binding_value, gyro_binding], duplicates_added
         return binding_value, duplicates_added
     
-    elif isinstance(binding_value, list):
-        # Array of bindings
+    elif value_type is list:
+        # Leave lists without any mapped controller_action untouched (no copy)
+        if not any(
+            gyro_binding_for(b) is not None for b in binding_value if isinstance(b, str)
+        ):
+            return binding_value, duplicates_added
+        
+        # Array of bindings; sets give O(1) "already present" checks
+        original_bindings = set(b for b in binding_value if isinstance(b, str))
+        added_bindings = set()
         new_bindings = []
         for binding in binding_value:
             new_bindings.append(binding)
             
             if isinstance(binding, str):
-                is_match, original_layer, gyro_layer = is_matching_controller_action(binding)
-                if is_match:
-                    gyro_binding = create_gyro_duplicate(binding, original_layer, gyro_layer)
+                gyro_binding = gyro_binding_for(binding)
+                if gyro_binding is not None:
                     # Only add if not already present
-                    if not gyro_version_exists(binding_value, gyro_binding) and not gyro_version_exists(new_bindings, gyro_binding):
+                    if gyro_binding not in original_bindings and gyro_binding not in added_bindings:
                         new_bindings.append(gyro_binding)
+                        added_bindings.add(gyro_binding)
                         duplicates_added += 1
         
         return new_bindings, duplicates_added
@@ -136,39 +152,43 @@ def process_binding_value(binding_value: Any) -> Tuple[Any, int]:
     return binding_value, duplicates_added
 
 
-def process_object(obj: Any, stats: Dict[str, int]) -> Any:
+def process_object(obj: Any, stats: Dict[str, int]) -> bool:
     """
-    Recursively process a JSON object, looking for 'binding' keys inside 'bindings' objects.
+    Walk a JSON object, looking for 'binding' keys inside 'bindings' objects.
+    
+    Uses an explicit stack rather than recursion. Bindings that gain gyro
+    duplicates are written back into their parent object in place.
     
     Args:
         obj: The object to process
         stats: Dictionary to track statistics
     
     Returns:
-        The processed object with gyro duplicates added
+        True if any binding was modified
     """
-    if isinstance(obj, dict):
-        new_obj = OrderedDict() if isinstance(obj, OrderedDict) else {}
-        
-        for key, value in obj.items():
-            if key == "binding" and isinstance(value, (str, list)):
-                # Found a binding - process it
-                new_value, duplicates_added = process_binding_value(value)
-                new_obj[key] = new_value
-                stats["duplicates_added"] += duplicates_added
-                if duplicates_added > 0:
-                    stats["bindings_modified"] += 1
-            else:
-                # Recurse into nested objects
-                new_obj[key] = process_object(value, stats)
-        
-        return new_obj
+    modified = False
+    stack = [obj]
+    while stack:
+        current = stack.pop()
+        # Exact type checks: parsed JSON only ever holds plain dicts and lists
+        current_type = type(current)
+        if current_type is dict:
+            for key, value in current.items():
+                value_type = type(value)
+                if key == "binding" and (value_type is str or value_type is list):
+                    # Found a binding - process it
+                    new_value, duplicates_added = process_binding_value(value)
+                    if duplicates_added > 0:
+                        current[key] = new_value
+                        stats["duplicates_added"] += duplicates_added
+                        stats["bindings_modified"] += 1
+                        modified = True
+                elif value_type is dict or value_type is list:
+                    stack.append(value)
+        elif current_type is list:
+            stack.extend(current)
     
-    elif isinstance(obj, list):
-        return [process_object(item, stats) for item in obj]
-    
-    else:
-        return obj
+    return modified
 
 
 def process_file(file_path: str, dry_run: bool = False) -> Dict[str, int]:
@@ -184,46 +204,37 @@ def process_file(file_path: str, dry_run: bool = False) -> Dict[str, int]:
     """
     print(f"\nProcessing: {file_path}")
     
-    # Load the file
-    data = load_json_file(file_path)
-    
     # Track statistics
     stats = {
         "duplicates_added": 0,
         "bindings_modified": 0
     }
     
+    # Load the file, only parsing it when a mapped remove_layer appears in the raw bytes
+    content = load_file_bytes(file_path)
+    if CONTROLLER_ACTION_BYTES_RE.search(content) is None:
+        print(f"  No changes needed (gyro duplicates may already exist)")
+        return stats
+    data = parse_json_bytes(file_path, content)
+    
     # Process the data
-    processed_data = process_object(data, stats)
+    modified = process_object(data, stats)
     
     # Report results
-    if stats["duplicates_added"] > 0:
+    if modified:
         print(f"  Found {stats['bindings_modified']} bindings to modify")
         print(f"  Added {stats['duplicates_added']} gyro duplicate actions")
         
         if dry_run:
             print(f"  [DRY RUN] Would save changes to: {file_path}")
         else:
-            save_json_file(file_path, processed_data)
+            save_json_file(file_path, data, content)
     else:
         print(f"  No changes needed (gyro duplicates may already exist)")
     
     return stats
 
 
-def find_neptune_json_files() -> List[str]:
-    """Find all JSON files in the neptune/ directory."""
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    neptune_dir = os.path.join(script_dir, "neptune")
-    
-    if not os.path.isdir(neptune_dir):
-        print(f"Error: neptune/ directory not found at {neptune_dir}")
-        sys.exit(1)
-    
-    json_files = glob.glob(os.path.join(neptune_dir, "*.json"))
-    return sorted(json_files)
-
-
 def main():
     parser = argparse.ArgumentParser(
         description="Add gyro duplicate actions to Steam Input layout files"
@@ -265,8 +276,7 @@ def main():
         "total_duplicates_added": 0
     }
     
-    for file_path in files_to_process:
-        stats = process_file(file_path, args.dry_run)
+    for stats in process_files(process_file, files_to_process, args.dry_run):
         total_stats["files_processed"] += 1
         if stats["duplicates_added"] > 0:
             total_stats["files_modified"] += 1
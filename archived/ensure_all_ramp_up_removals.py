@@ -17,14 +17,16 @@ Usage:
     python3 ensure_all_ramp_up_removals.py --dry-run          # Preview changes without modifying
 """
 
-import json
 import sys
 import os
-import glob
+import re
 import argparse
-from collections import OrderedDict
 from typing import Dict, Any, List, Tuple, Set
 
+from _jsonio import (
+    load_file_bytes, parse_json_bytes, save_json_file, find_neptune_json_files, process_files
+)
+
 # All Turning Ramp Up variants that should be removed together
 RAMP_UP_VARIANTS = [
     "{{Base::Turning Ramp Up 0}}",
@@ -41,67 +43,62 @@ RAMP_UP_REMOVALS = [
     "controller_action remove_layer {{Base::(Gyro) Turning Ramp Up 1}} 0 0, , ",
 ]
 
+# Removal commands keyed by their stripped form, for exact-match lookups
+RAMP_UP_REMOVALS_BY_STRIPPED = {removal.strip(): removal for removal in RAMP_UP_REMOVALS}
 
-def load_json_file(file_path: str) -> Dict[str, Any]:
-    """Load and parse a JSON file, preserving key order."""
-    try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            return json.load(f, object_pairs_hook=OrderedDict)
-    except FileNotFoundError:
-        print(f"Error: File '{file_path}' not found.")
-        sys.exit(1)
-    except json.JSONDecodeError as e:
-        print(f"Error: Invalid JSON in file '{file_path}': {e}")
-        sys.exit(1)
+# Literal prefix shared by all variant removals; a plain substring test rules
+# out most bindings faster than running the regex
+RAMP_UP_REMOVAL_PREFIX = os.path.commonprefix(RAMP_UP_REMOVALS)
 
+# Single alternation over all variant removals, compiled once at import
+RAMP_UP_REMOVAL_RE = re.compile(
+    "controller_action remove_layer (?:"
+    + "|".join(re.escape(variant) for variant in RAMP_UP_VARIANTS)
+    + ")"
+)
 
-def save_json_file(file_path: str, data: Dict[str, Any]) -> None:
-    """Save data to a JSON file with proper formatting."""
-    try:
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent='\t', ensure_ascii=False)
-        print(f"  Saved: {file_path}")
-    except Exception as e:
-        print(f"Error saving file: {e}")
-        sys.exit(1)
+# Same pattern over raw file bytes, for pre-scanning a layout before it is parsed
+RAMP_UP_REMOVAL_BYTES_RE = re.compile(RAMP_UP_REMOVAL_RE.pattern.encode())
 
 
 def contains_ramp_up_removal(binding: str) -> bool:
     """Check if a binding contains a remove_layer for any Turning Ramp Up variant."""
-    for variant in RAMP_UP_VARIANTS:
-        if f"controller_action remove_layer {variant}" in binding:
-            return True
-    return False
+    return RAMP_UP_REMOVAL_PREFIX in binding and RAMP_UP_REMOVAL_RE.search(binding) is not None
 
 
-def get_existing_ramp_up_removals(bindings: List[str]) -> Set[str]:
-    """Get the set of Ramp Up removal commands already in the bindings."""
+def scan_ramp_up_removals(bindings: List[str]) -> Tuple[int, Set[str]]:
+    """
+    Scan the bindings once for Ramp Up removals.
+    
+    Returns:
+        Tuple of (index of the first Ramp Up removal or -1, set of removal commands present)
+    """
+    first_index = -1
     existing = set()
-    for binding in bindings:
-        for removal in RAMP_UP_REMOVALS:
-            if removal in binding or removal.strip() == binding.strip():
-                existing.add(removal)
-    return existing
-
-
-def find_ramp_up_insertion_index(bindings: List[str]) -> int:
-    """Find the index where the first Ramp Up removal appears."""
     for i, binding in enumerate(bindings):
-        if contains_ramp_up_removal(binding):
-            return i
-    return 0
+        if not isinstance(binding, str):
+            continue
+        # Generated bindings are usually exactly one removal command
+        removal = RAMP_UP_REMOVALS_BY_STRIPPED.get(binding.strip())
+        if removal is not None:
+            existing.add(removal)
+        elif contains_ramp_up_removal(binding):
+            # Rare: the removal is embedded in a longer binding string
+            existing.update(r for r in RAMP_UP_REMOVALS if r in binding)
+        else:
+            continue
+        if first_index < 0:
+            first_index = i
+    return first_index, existing
 
 
 def remove_duplicates_preserve_order(bindings: List[str]) -> List[str]:
     """Remove duplicate bindings while preserving order."""
-    seen = set()
-    result = []
+    # Keyed by the stripped form; the first variant seen is the one kept
+    unique = {}
     for binding in bindings:
-        normalized = binding.strip()
-        if normalized not in seen:
-            seen.add(normalized)
-            result.append(binding)
-    return result
+        unique.setdefault(binding.strip(), binding)
+    return list(unique.values())
 
 
 def process_binding_value(binding_value: Any, stats: Dict[str, int]) -> Tuple[Any, bool]:
@@ -111,7 +108,8 @@ def process_binding_value(binding_value: Any, stats: Dict[str, int]) -> Tuple[An
     Returns:
         Tuple of (new_binding_value, was_modified)
     """
-    if isinstance(binding_value, str):
+    value_type = type(binding_value)
+    if value_type is str:
         # Single string binding
         if contains_ramp_up_removal(binding_value):
             # Convert to array with all variants
@@ -124,17 +122,13 @@ def process_binding_value(binding_value: Any, stats: Dict[str, int]) -> Tuple[An
             return new_bindings, True
         return binding_value, False
     
-    elif isinstance(binding_value, list):
-        # Check if any binding contains a Ramp Up removal
-        has_ramp_up_removal = any(
-            contains_ramp_up_removal(b) for b in binding_value if isinstance(b, str)
-        )
+    elif value_type is list:
+        # Find the first Ramp Up removal and the removals already present in one pass
+        first_index, existing_removals = scan_ramp_up_removals(binding_value)
         
-        if not has_ramp_up_removal:
+        if first_index < 0:
             return binding_value, False
         
-        # Get existing removals
-        existing_removals = get_existing_ramp_up_removals(binding_value)
         missing_removals = [r for r in RAMP_UP_REMOVALS if r not in existing_removals]
         
         if not missing_removals:
@@ -145,16 +139,10 @@ def process_binding_value(binding_value: Any, stats: Dict[str, int]) -> Tuple[An
                 return new_bindings, True
             return binding_value, False
         
-        # Find insertion point (after the first Ramp Up removal found)
-        insert_index = find_ramp_up_insertion_index(binding_value) + 1
-        
-        # Build new bindings list
-        new_bindings = list(binding_value)
-        
-        # Insert missing removals
-        for i, removal in enumerate(missing_removals):
-            new_bindings.insert(insert_index + i, removal)
-            stats["removals_added"] += 1
+        # Insert missing removals after the first Ramp Up removal found
+        insert_index = first_index + 1
+        new_bindings = binding_value[:insert_index] + missing_removals + binding_value[insert_index:]
+        stats["removals_added"] += len(missing_removals)
         
         # Remove duplicates
         new_bindings = remove_duplicates_preserve_order(new_bindings)
@@ -165,38 +153,41 @@ def process_binding_value(binding_value: Any, stats: Dict[str, int]) -> Tuple[An
     return binding_value, False
 
 
-def process_object(obj: Any, stats: Dict[str, int]) -> Any:
-    """
-    Recursively process a JSON object, looking for 'binding' keys inside 'bindings' objects.
+def process_object(obj: Any, stats: Dict[str, int]) -> bool:
     """
-    if isinstance(obj, dict):
-        new_obj = OrderedDict() if isinstance(obj, OrderedDict) else {}
-        
-        for key, value in obj.items():
-            if key == "binding" and isinstance(value, (str, list)):
-                # Found a binding - process it
-                new_value, was_modified = process_binding_value(value, stats)
-                new_obj[key] = new_value
-            else:
-                # Recurse into nested objects
-                new_obj[key] = process_object(value, stats)
-        
-        return new_obj
+    Walk a JSON object, looking for 'binding' keys inside 'bindings' objects.
     
-    elif isinstance(obj, list):
-        return [process_object(item, stats) for item in obj]
+    Uses an explicit stack rather than recursion. Changed bindings are written
+    back into their parent object in place; the return value reports whether
+    any were, which also covers lists where only duplicates were removed.
+    """
+    modified = False
+    stack = [obj]
+    while stack:
+        current = stack.pop()
+        # Exact type checks: parsed JSON only ever holds plain dicts and lists
+        current_type = type(current)
+        if current_type is dict:
+            for key, value in current.items():
+                value_type = type(value)
+                if key == "binding" and (value_type is str or value_type is list):
+                    # Found a binding - process it
+                    new_value, was_modified = process_binding_value(value, stats)
+                    if was_modified:
+                        current[key] = new_value
+                        modified = True
+                elif value_type is dict or value_type is list:
+                    stack.append(value)
+        elif current_type is list:
+            stack.extend(current)
     
-    else:
-        return obj
+    return modified
 
 
 def process_file(file_path: str, dry_run: bool = False) -> Dict[str, int]:
     """Process a single JSON file."""
     print(f"\nProcessing: {file_path}")
     
-    # Load the file
-    data = load_json_file(file_path)
-    
     # Track statistics
     stats = {
         "bindings_modified": 0,
@@ -204,12 +195,18 @@ def process_file(file_path: str, dry_run: bool = False) -> Dict[str, int]:
         "duplicates_removed": 0
     }
     
+    # Load the file, only parsing it when a Ramp Up removal appears in the raw bytes
+    content = load_file_bytes(file_path)
+    if RAMP_UP_REMOVAL_BYTES_RE.search(content) is None:
+        print(f"  No changes needed (all variants already present or no Ramp Up removals found)")
+        return stats
+    data = parse_json_bytes(file_path, content)
+    
     # Process the data
-    processed_data = process_object(data, stats)
+    modified = process_object(data, stats)
     
     # Report results
-    total_changes = stats["bindings_modified"]
-    if total_changes > 0:
+    if modified:
         print(f"  Bindings modified: {stats['bindings_modified']}")
         print(f"  Removals added: {stats['removals_added']}")
         print(f"  Duplicates removed: {stats['duplicates_removed']}")
@@ -217,26 +214,13 @@ def process_file(file_path: str, dry_run: bool = False) -> Dict[str, int]:
         if dry_run:
             print(f"  [DRY RUN] Would save changes to: {file_path}")
         else:
-            save_json_file(file_path, processed_data)
+            save_json_file(file_path, data, content)
     else:
         print(f"  No changes needed (all variants already present or no Ramp Up removals found)")
     
     return stats
 
 
-def find_neptune_json_files() -> List[str]:
-    """Find all JSON files in the neptune/ directory."""
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    neptune_dir = os.path.join(script_dir, "neptune")
-    
-    if not os.path.isdir(neptune_dir):
-        print(f"Error: neptune/ directory not found at {neptune_dir}")
-        sys.exit(1)
-    
-    json_files = glob.glob(os.path.join(neptune_dir, "*.json"))
-    return sorted(json_files)
-
-
 def main():
     parser = argparse.ArgumentParser(
         description="Ensure all Turning Ramp Up variants are removed together"
@@ -284,10 +268,9 @@ def main():
         "total_removals_added": 0
     }
     
-    for file_path in files_to_process:
-        stats = process_file(file_path, args.dry_run)
+    for stats in process_files(process_file, files_to_process, args.dry_run):
         total_stats["files_processed"] += 1
-        if stats["bindings_modified"] > 0:
+        if stats["bindings_modified"] > 0 or stats["duplicates_removed"] > 0:
             total_stats["files_modified"] += 1
             total_stats["total_bindings_modified"] += stats["bindings_modified"]
             total_stats["total_removals_added"] += stats["removals_added"]
@@ -26,49 +26,38 @@ Usage:
     python3 fix_gyro_layer_references.py file.json --dry-run
 """
 
-import json
 import sys
 import os
-import glob
 import argparse
-import re
-from collections import OrderedDict
 from typing import Dict, Any, List, Tuple, Set, Optional
 
+from _jsonio import (
+    load_file_bytes, parse_json_bytes, save_json_file, find_neptune_json_files, process_files
+)
 
-def load_json_file(file_path: str) -> Dict[str, Any]:
-    """Load and parse a JSON file, preserving key order."""
-    try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            return json.load(f, object_pairs_hook=OrderedDict)
-    except FileNotFoundError:
-        print(f"Error: File '{file_path}' not found.")
-        sys.exit(1)
-    except json.JSONDecodeError as e:
-        print(f"Error: Invalid JSON in file '{file_path}': {e}")
-        sys.exit(1)
 
+# Literal prefix of every add_layer reference; the layer name follows it up to "}}"
+BASE_ADD_LAYER_PREFIX = "controller_action add_layer {{Base::"
 
-def save_json_file(file_path: str, data: Dict[str, Any]) -> None:
-    """Save data to a JSON file with proper formatting."""
-    try:
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent='\t', ensure_ascii=False)
-        print(f"  Saved: {file_path}")
-    except Exception as e:
-        print(f"Error saving file: {e}")
-        sys.exit(1)
+# Every Gyro layer title contains this, normally as the GYRO_TITLE_PREFIX
+GYRO_TITLE_MARKER = "(Gyro)"
+GYRO_TITLE_PREFIX = "(Gyro) "
 
+# json never escapes the marker, so a file whose raw bytes lack it has no
+# Gyro layers and need not be parsed
+GYRO_TITLE_MARKER_BYTES = GYRO_TITLE_MARKER.encode()
 
-def extract_layer_name_from_reference(reference: str) -> Optional[str]:
+
+def strip_gyro_prefix(title: str) -> str:
     """
-    Extract the layer name from a layer reference like "{{Base::L2: Modifier 0}}".
-    Returns "L2: Modifier 0" from "{{Base::L2: Modifier 0}}".
+    Turn a Gyro layer title into its non-Gyro name.
+    
+    "(Gyro) L2: Modifier 0" -> "L2: Modifier 0". Titles that start with the
+    prefix are sliced; anything else falls back to removing it wherever it is.
     """
-    match = re.search(r'\{\{Base::([^}]+)\}\}', reference)
-    if match:
-        return match.group(1)
-    return None
+    if title.startswith(GYRO_TITLE_PREFIX):
+        return title[len(GYRO_TITLE_PREFIX):]
+    return title.replace(GYRO_TITLE_PREFIX, "")
 
 
 def build_layer_mapping(action_layers: Dict[str, Any]) -> Tuple[Dict[str, str], Set[str], Dict[str, str]]:
@@ -84,33 +73,42 @@ def build_layer_mapping(action_layers: Dict[str, Any]) -> Tuple[Dict[str, str],
     gyro_layer_preset_ids = set()  # Preset IDs of Gyro layers
     preset_id_to_title = {}  # "Preset_1000148" -> "(Gyro) L2: Modifier 0"
     
-    # First pass: collect all layer titles and identify Gyro layers
-    all_layer_titles = {}
+    # Single pass: record each title and map every Gyro layer back to its
+    # non-Gyro name
     for preset_id, layer_info in action_layers.items():
         title = layer_info.get("title", "")
-        all_layer_titles[preset_id] = title
         preset_id_to_title[preset_id] = title
         
-        if "(Gyro)" in title:
+        if GYRO_TITLE_MARKER in title:
             gyro_layer_preset_ids.add(preset_id)
-    
-    # Second pass: build non-Gyro to Gyro mapping
-    for preset_id, title in all_layer_titles.items():
-        if "(Gyro)" in title:
-            # Extract the non-Gyro version of this title
-            # "(Gyro) L2: Modifier 0" -> "L2: Modifier 0"
-            non_gyro_title = title.replace("(Gyro) ", "")
-            non_gyro_to_gyro[non_gyro_title] = title
+            non_gyro_title = strip_gyro_prefix(title)
+            # Interned so every change record and rewritten reference shares
+            # one copy of each name
+            non_gyro_to_gyro[sys.intern(non_gyro_title)] = sys.intern(title)
     
     return non_gyro_to_gyro, gyro_layer_preset_ids, preset_id_to_title
 
 
-def find_preset_by_name(presets: List[Dict], preset_name: str) -> Optional[Dict]:
-    """Find a preset entry by its name field."""
+def get_redirectable_layers(non_gyro_to_gyro: Dict[str, str]) -> Dict[str, str]:
+    """
+    Narrow non_gyro_to_gyro to the layer names an add_layer may be redirected from.
+    
+    Names that are empty or already refer to a Gyro layer are left out, so a
+    single dict lookup decides whether a reference needs fixing.
+    """
+    return {
+        name: gyro_name
+        for name, gyro_name in non_gyro_to_gyro.items()
+        if name and GYRO_TITLE_MARKER not in name
+    }
+
+
+def index_presets_by_name(presets: List[Dict]) -> Dict[Any, Dict]:
+    """Map each preset name to the first preset entry with that name."""
+    preset_by_name = {}
     for preset in presets:
-        if preset.get("name") == preset_name:
-            return preset
-    return None
+        preset_by_name.setdefault(preset.get("name"), preset)
+    return preset_by_name
 
 
 def get_group_ids_from_preset(preset: Dict) -> List[str]:
@@ -119,130 +117,172 @@ def get_group_ids_from_preset(preset: Dict) -> List[str]:
     return list(group_source_bindings.keys())
 
 
-def find_groups_by_ids(groups: List[Dict], group_ids: List[str]) -> List[Dict]:
-    """Find all groups matching the given IDs."""
-    matching_groups = []
-    for group in groups:
-        if group.get("id") in group_ids:
-            matching_groups.append(group)
-    return matching_groups
+def index_group_positions(groups: List[Dict]) -> Dict[Any, List[int]]:
+    """Map each group ID to the positions of the groups carrying it."""
+    group_positions = {}
+    for position, group in enumerate(groups):
+        group_positions.setdefault(group.get("id"), []).append(position)
+    return group_positions
 
 
-def fix_add_layer_reference(binding: str, non_gyro_to_gyro: Dict[str, str]) -> Tuple[str, bool]:
+def find_groups_by_ids(groups: List[Dict], group_positions: Dict[Any, List[int]],
+                       group_ids: List[str]) -> List[Dict]:
+    """Find all groups matching the given IDs, in their order within groups."""
+    positions = sorted(
+        position
+        for group_id in group_ids
+        for position in group_positions.get(group_id, ())
+    )
+    return [groups[position] for position in positions]
+
+
+def fix_add_layer_reference(binding: str, redirects: Dict[str, str]) -> Tuple[str, Optional[str]]:
     """
     Check if a binding contains an add_layer command that should be fixed.
     
+    The reference is located with plain string searches rather than a regex,
+    since it always starts with the literal BASE_ADD_LAYER_PREFIX.
+    
     Returns:
-        Tuple of (fixed_binding, was_fixed)
+        Tuple of (fixed_binding, redirected_layer_name); the layer name is the
+        non-Gyro layer that was replaced, or None if nothing was fixed
     """
-    # Pattern to match: controller_action add_layer {{Base::LayerName}} ...
-    pattern = r'controller_action add_layer \{\{Base::([^}]+)\}\}'
-    
-    match = re.search(pattern, binding)
-    if not match:
-        return binding, False
-    
-    layer_name = match.group(1)
+    start = binding.find(BASE_ADD_LAYER_PREFIX)
+    if start < 0:
+        return binding, None
     
-    # Skip if already referencing a Gyro layer
-    if "(Gyro)" in layer_name:
-        return binding, False
+    # The layer name runs up to the first "}", which must open the closing "}}"
+    start += len(BASE_ADD_LAYER_PREFIX)
+    end = binding.find("}", start)
+    if end <= start or not binding.startswith("}}", end):
+        return binding, None
     
-    # Check if this non-Gyro layer has a Gyro counterpart
-    if layer_name in non_gyro_to_gyro:
-        gyro_layer_name = non_gyro_to_gyro[layer_name]
-        old_ref = f"{{{{Base::{layer_name}}}}}"
-        new_ref = f"{{{{Base::{gyro_layer_name}}}}}"
-        fixed_binding = binding.replace(old_ref, new_ref)
-        return fixed_binding, True
+    layer_name = binding[start:end]
+    gyro_layer_name = redirects.get(layer_name)
+    if gyro_layer_name is None:
+        return binding, None
     
-    return binding, False
+    old_ref = f"{{{{Base::{layer_name}}}}}"
+    new_ref = f"{{{{Base::{gyro_layer_name}}}}}"
+    fixed_binding = binding.replace(old_ref, new_ref)
+    return fixed_binding, layer_name
 
 
-def process_binding_value(binding_value: Any, non_gyro_to_gyro: Dict[str, str], 
-                          context: str) -> Tuple[Any, List[Dict]]:
+def process_binding_value(binding_value: Any, redirects: Dict[str, str]) -> Tuple[Any, List[Dict]]:
     """
     Process a binding value (string or list) and fix add_layer references.
     
+    The caller adds the "context" of each change, since building it is only
+    worth doing once something has changed.
+    
     Returns:
         Tuple of (new_binding_value, list_of_changes)
     """
     changes = []
     
     if isinstance(binding_value, str):
-        fixed_binding, was_fixed = fix_add_layer_reference(binding_value, non_gyro_to_gyro)
-        if was_fixed:
+        fixed_binding, layer_name = fix_add_layer_reference(binding_value, redirects)
+        if layer_name is not None:
             changes.append({
-                "context": context,
                 "old": binding_value,
-                "new": fixed_binding
+                "new": fixed_binding,
+                "old_layer": layer_name,
+                "new_layer": redirects[layer_name]
             })
         return fixed_binding, changes
     
     elif isinstance(binding_value, list):
-        new_bindings = []
-        for binding in binding_value:
-            if isinstance(binding, str):
-                fixed_binding, was_fixed = fix_add_layer_reference(binding, non_gyro_to_gyro)
-                if was_fixed:
-                    changes.append({
-                        "context": context,
-                        "old": binding,
-                        "new": fixed_binding
-                    })
-                new_bindings.append(fixed_binding)
-            else:
-                new_bindings.append(binding)
-        return new_bindings, changes
+        # Copied only once a binding actually changes
+        new_bindings = None
+        for index, binding in enumerate(binding_value):
+            if type(binding) is not str:
+                continue
+            fixed_binding, layer_name = fix_add_layer_reference(binding, redirects)
+            if layer_name is not None:
+                changes.append({
+                    "old": binding,
+                    "new": fixed_binding,
+                    "old_layer": layer_name,
+                    "new_layer": redirects[layer_name]
+                })
+                if new_bindings is None:
+                    new_bindings = list(binding_value)
+                new_bindings[index] = fixed_binding
+        return binding_value if new_bindings is None else new_bindings, changes
     
     return binding_value, changes
 
 
-def process_object_for_add_layers(obj: Any, non_gyro_to_gyro: Dict[str, str], 
-                                   context: str = "") -> Tuple[Any, List[Dict]]:
+def format_context(context: str, trail: Optional[Tuple]) -> str:
     """
-    Recursively process a JSON object, looking for 'binding' keys and fixing add_layer refs.
+    Build the reporting path for a walker entry from its trail of keys.
+    
+    A trail is a (key, parent_trail) chain ending in None, with list indices
+    as ints; it is rendered like "Group 0.inputs.button_a[1]".
+    """
+    keys = []
+    while trail is not None:
+        key, trail = trail
+        keys.append(key)
+    for key in reversed(keys):
+        if type(key) is int:
+            context = f"{context}[{key}]"
+        else:
+            context = f"{context}.{key}" if context else key
+    return context
+
+
+def process_object_for_add_layers(obj: Any, redirects: Dict[str, str],
+                                  context: str = "") -> List[Dict]:
+    """
+    Walk a JSON object, fixing add_layer refs in 'binding' keys in place.
+    
+    Uses an explicit stack rather than recursion. Entries are pushed in
+    reverse so they are visited in document order, and scalar values are
+    never pushed. Only bindings that actually change are written back, and
+    only their context path is ever turned into a string.
     
     Args:
         obj: The object to process
-        non_gyro_to_gyro: Mapping of non-Gyro layer names to Gyro counterparts
+        redirects: Mapping from get_redirectable_layers
         context: Current context path for reporting
     
     Returns:
-        Tuple of (processed_object, list_of_changes)
+        List of changes made
     """
     all_changes = []
     
-    if isinstance(obj, dict):
-        new_obj = OrderedDict() if isinstance(obj, OrderedDict) else {}
+    # Each entry is (parent container, key or index in parent, value, trail);
+    # see format_context for the trail
+    stack = [(None, None, obj, None)]
+    while stack:
+        parent, key, value, trail = stack.pop()
         
-        for key, value in obj.items():
-            new_context = f"{context}.{key}" if context else key
-            
-            if key == "binding" and isinstance(value, (str, list)):
-                # Found a binding - process it
-                new_value, changes = process_binding_value(value, non_gyro_to_gyro, new_context)
-                new_obj[key] = new_value
-                all_changes.extend(changes)
-            else:
-                # Recurse into nested objects
-                processed_value, changes = process_object_for_add_layers(value, non_gyro_to_gyro, new_context)
-                new_obj[key] = processed_value
+        value_type = type(value)
+        if key == "binding" and (value_type is str or value_type is list):
+            # Found a binding - process it
+            new_value, changes = process_binding_value(value, redirects)
+            if changes:
+                parent[key] = new_value
+                change_context = format_context(context, trail)
+                for change in changes:
+                    change["context"] = change_context
                 all_changes.extend(changes)
         
-        return new_obj, all_changes
-    
-    elif isinstance(obj, list):
-        new_list = []
-        for i, item in enumerate(obj):
-            new_context = f"{context}[{i}]"
-            processed_item, changes = process_object_for_add_layers(item, non_gyro_to_gyro, new_context)
-            new_list.append(processed_item)
-            all_changes.extend(changes)
-        return new_list, all_changes
+        elif value_type is dict:
+            for child_key, child in reversed(value.items()):
+                child_type = type(child)
+                if child_type is dict or child_type is list or child_key == "binding":
+                    stack.append((value, child_key, child, (child_key, trail)))
+        
+        elif value_type is list:
+            for i in range(len(value) - 1, -1, -1):
+                child = value[i]
+                child_type = type(child)
+                if child_type is dict or child_type is list:
+                    stack.append((value, i, child, (i, trail)))
     
-    else:
-        return obj, all_changes
+    return all_changes
 
 
 def process_file(file_path: str, dry_run: bool = False) -> Dict[str, Any]:
@@ -258,8 +298,14 @@ def process_file(file_path: str, dry_run: bool = False) -> Dict[str, Any]:
     """
     print(f"\nProcessing: {file_path}")
     
-    # Load the file
-    data = load_json_file(file_path)
+    # Load the file, only parsing it when a Gyro layer title can be present.
+    # Files with Gyro layers are always parsed, even with nothing to fix, so
+    # their layers are still listed and counted as checked.
+    content = load_file_bytes(file_path)
+    if content.find(GYRO_TITLE_MARKER_BYTES) < 0:
+        print("  No Gyro layers to process")
+        return {"fixes_made": 0, "gyro_layers_checked": 0}
+    data = parse_json_bytes(file_path, content)
     
     # Get the relevant sections
     controller_mappings = data.get("controller_mappings", {})
@@ -286,6 +332,13 @@ def process_file(file_path: str, dry_run: bool = False) -> Dict[str, Any]:
     for non_gyro, gyro in sorted(non_gyro_to_gyro.items()):
         print(f"    {non_gyro} → {gyro}")
     
+    # Layers an add_layer may be redirected from, built once per file
+    redirects = get_redirectable_layers(non_gyro_to_gyro)
+    
+    # Index presets and groups once instead of scanning them per Gyro layer
+    preset_by_name = index_presets_by_name(presets)
+    group_positions = index_group_positions(groups)
+    
     # Track all changes
     all_changes = []
     gyro_layers_checked = 0
@@ -296,7 +349,7 @@ def process_file(file_path: str, dry_run: bool = False) -> Dict[str, Any]:
         layer_title = preset_id_to_title.get(preset_id, "Unknown")
         
         # Find the preset for this Gyro layer
-        preset = find_preset_by_name(presets, preset_id)
+        preset = preset_by_name.get(preset_id)
         if not preset:
             print(f"    Warning: No preset found for Gyro layer '{layer_title}' ({preset_id})")
             continue
@@ -307,36 +360,27 @@ def process_file(file_path: str, dry_run: bool = False) -> Dict[str, Any]:
         group_ids = get_group_ids_from_preset(preset)
         
         # Find and process the groups
-        layer_groups = find_groups_by_ids(groups, group_ids)
+        layer_groups = find_groups_by_ids(groups, group_positions, group_ids)
         
         for group in layer_groups:
             group_id = group.get("id", "?")
             context = f"Gyro Layer '{layer_title}' -> Group {group_id}"
             
-            # Process the group's inputs for add_layer references
-            processed_group, changes = process_object_for_add_layers(
-                group, non_gyro_to_gyro, context
-            )
-            
-            if changes:
-                all_changes.extend(changes)
-                # Update the group in place
-                group.clear()
-                group.update(processed_group)
+            # Fix the group's add_layer references in place
+            all_changes.extend(process_object_for_add_layers(group, redirects, context))
     
     # Report changes
     if all_changes:
         print(f"\n  Found {len(all_changes)} add_layer references to fix:")
-        for change in all_changes:
-            # Extract layer names for cleaner output
-            old_layer = extract_layer_name_from_reference(change["old"]) or change["old"]
-            new_layer = extract_layer_name_from_reference(change["new"]) or change["new"]
-            print(f"    - {old_layer} → {new_layer}")
+        # Layer names were recorded when each reference was fixed
+        print("\n".join(
+            f"    - {change['old_layer']} → {change['new_layer']}" for change in all_changes
+        ))
         
         if dry_run:
             print(f"\n  [DRY RUN] Would save changes to: {file_path}")
         else:
-            save_json_file(file_path, data)
+            save_json_file(file_path, data, content)
     else:
         print("\n  No add_layer references need fixing")
     
@@ -346,19 +390,6 @@ def process_file(file_path: str, dry_run: bool = False) -> Dict[str, Any]:
     }
 
 
-def find_neptune_json_files() -> List[str]:
-    """Find all JSON files in the neptune/ directory."""
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    neptune_dir = os.path.join(script_dir, "neptune")
-    
-    if not os.path.isdir(neptune_dir):
-        print(f"Error: neptune/ directory not found at {neptune_dir}")
-        sys.exit(1)
-    
-    json_files = glob.glob(os.path.join(neptune_dir, "*.json"))
-    return sorted(json_files)
-
-
 def main():
     parser = argparse.ArgumentParser(
         description="Fix add_layer references in Gyro layers to point to Gyro counterparts"
@@ -403,8 +434,7 @@ def main():
         "total_gyro_layers_checked": 0
     }
     
-    for file_path in files_to_process:
-        stats = process_file(file_path, args.dry_run)
+    for stats in process_files(process_file, files_to_process, args.dry_run):
         total_stats["files_processed"] += 1
         total_stats["total_gyro_layers_checked"] += stats["gyro_layers_checked"]
         if stats["fixes_made"] > 0:
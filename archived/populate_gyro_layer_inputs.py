@@ -22,10 +22,14 @@ Usage:
 import json
 import sys
 import os
-import glob
 import argparse
-from collections import OrderedDict
-from typing import Dict, Any, List, Set
+import re
+from typing import Dict, Any, List, Set, Tuple
+
+from _jsonio import (
+    orjson, load_file_bytes, parse_json_bytes, save_json_file, find_neptune_json_files,
+    process_files,
+)
 
 # Gyro layer group IDs
 GYRO_LAYER_GROUPS = {
@@ -35,278 +39,289 @@ GYRO_LAYER_GROUPS = {
     "joystick": "12976",
 }
 
+# A quoted group ID as it appears in the raw file; json never escapes digits,
+# so a file without any of these has none of the groups to populate
+GYRO_LAYER_GROUP_IDS_BYTES_RE = re.compile(
+    b"|".join(b'"' + group_id.encode() + b'"' for group_id in GYRO_LAYER_GROUPS.values())
+)
+
 # Cleanup removals for trigger/bumper additions
-CLEANUP_REMOVALS = [
+CLEANUP_REMOVALS = (
     "controller_action remove_layer {{Base::Gyro Off}} 0 0, , ",
     "controller_action remove_layer {{Base::Turning Ramp Up 0}} 0 0, , ",
     "controller_action remove_layer {{Base::Turning Ramp Up 1}} 0 0, , ",
     "controller_action remove_layer {{Base::(Gyro) Turning Ramp Up 0}} 0 0, , ",
     "controller_action remove_layer {{Base::(Gyro) Turning Ramp Up 1}} 0 0, , ",
-]
+)
 
+# Full binding lists for the trigger layer additions, each followed by the cleanup removals
+GYRO_L2_TRIGGER_BINDINGS = ("controller_action add_layer {{Base::(Gyro) L2}} 0 0, , ", *CLEANUP_REMOVALS)
+GYRO_R2_TRIGGER_BINDINGS = ("controller_action add_layer {{Base::(Gyro) R2}} 0 0, , ", *CLEANUP_REMOVALS)
+GYRO_L1_TRIGGER_BINDINGS = ("controller_action add_layer {{Base::(Gyro) L1}} 0 0, , ", *CLEANUP_REMOVALS)
+GYRO_R1_TRIGGER_BINDINGS = ("controller_action add_layer {{Base::(Gyro) R1}} 0 0, , ", *CLEANUP_REMOVALS)
 
-def load_json_file(file_path: str) -> Dict[str, Any]:
-    """Load and parse a JSON file, preserving key order."""
-    try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            return json.load(f, object_pairs_hook=OrderedDict)
-    except FileNotFoundError:
-        print(f"Error: File '{file_path}' not found.")
-        sys.exit(1)
-    except json.JSONDecodeError as e:
-        print(f"Error: Invalid JSON in file '{file_path}': {e}")
-        sys.exit(1)
+# Single modifier layer additions; modifier layers don't need cleanup removals
+GYRO_L1_MODIFIER_0_BINDING = "controller_action add_layer {{Base::(Gyro) L1: Modifier 0}} 0 0, , "
+GYRO_R1_MODIFIER_1_BINDING = "controller_action add_layer {{Base::(Gyro) R1: Modifier 1}} 0 0, , "
+GYRO_L2_MODIFIER_0_BINDING = "controller_action add_layer {{Base::(Gyro) L2: Modifier 0}} 0 0, , "
+GYRO_R2_MODIFIER_1_BINDING = "controller_action add_layer {{Base::(Gyro) R2: Modifier 1}} 0 0, , "
 
+# Joystick edge bindings: Gyro Off plus the (Gyro) Turning Ramp Up 0 layer
+GYRO_JOYSTICK_EDGE_BINDINGS = (
+    "controller_action add_layer {{Base::Gyro Off}} 0 0, , ",
+    "controller_action add_layer {{Base::(Gyro) Turning Ramp Up 0}} 0 0, , ",
+)
 
-def save_json_file(file_path: str, data: Dict[str, Any]) -> None:
-    """Save data to a JSON file with proper formatting."""
-    try:
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent='\t', ensure_ascii=False)
-        print(f"  Saved: {file_path}")
-    except Exception as e:
-        print(f"Error saving file: {e}")
-        sys.exit(1)
 
-
-def is_alternative_layout(file_path: str) -> bool:
-    """Check if the file is an alternative layout."""
-    return "alternative" in os.path.basename(file_path).lower()
+def create_trigger_click_input(bindings: Tuple[str, ...]) -> Dict[str, Any]:
+    """Create the click input structure for a trigger group (for triggers adding trigger layers)."""
+    return {
+        "click": {
+            "activators": {
+                "Full_Press": {
+                    "bindings": {
+                        "binding": list(bindings)
+                    },
+                    "settings": {
+                        "hold_repeats": "1",
+                        "interruptable": "0"
+                    }
+                }
+            },
+            "disabled_activators": {}
+        }
+    }
 
 
-def create_trigger_click_input(layer_name: str) -> OrderedDict:
-    """Create the click input structure for a trigger group (for triggers adding trigger layers)."""
-    bindings = [f"controller_action add_layer {layer_name} 0 0, , "] + CLEANUP_REMOVALS
-    
-    return OrderedDict([
-        ("click", OrderedDict([
-            ("activators", OrderedDict([
-                ("Full_Press", OrderedDict([
-                    ("bindings", OrderedDict([
-                        ("binding", bindings)
-                    ])),
-                    ("settings", OrderedDict([
-                        ("hold_repeats", "1"),
-                        ("interruptable", "0")
-                    ]))
-                ]))
-            ])),
-            ("disabled_activators", OrderedDict())
-        ]))
-    ])
-
-
-def create_trigger_edge_input(layer_name: str) -> OrderedDict:
+def create_trigger_edge_input(binding: str) -> Dict[str, Any]:
     """Create the edge input structure for a trigger group (for modifiers in alternative layout)."""
-    # Modifier layers don't need cleanup removals, just add the layer
-    return OrderedDict([
-        ("edge", OrderedDict([
-            ("activators", OrderedDict([
-                ("Full_Press", OrderedDict([
-                    ("bindings", OrderedDict([
-                        ("binding", f"controller_action add_layer {layer_name} 0 0, , ")
-                    ])),
-                    ("settings", OrderedDict([
-                        ("hold_repeats", "1"),
-                        ("interruptable", "0")
-                    ]))
-                ]))
-            ])),
-            ("disabled_activators", OrderedDict())
-        ]))
-    ])
-
-
-def create_bumper_inputs_full_press(left_layer: str, right_layer: str) -> OrderedDict:
+    return {
+        "edge": {
+            "activators": {
+                "Full_Press": {
+                    "bindings": {
+                        "binding": binding
+                    },
+                    "settings": {
+                        "hold_repeats": "1",
+                        "interruptable": "0"
+                    }
+                }
+            },
+            "disabled_activators": {}
+        }
+    }
+
+
+def create_bumper_inputs_full_press(left_bindings: Tuple[str, ...],
+                                    right_bindings: Tuple[str, ...]) -> Dict[str, Any]:
     """Create the bumper input structures for triggers using Full_Press (with cleanup)."""
-    left_bindings = [f"controller_action add_layer {left_layer} 0 0, , "] + CLEANUP_REMOVALS
-    right_bindings = [f"controller_action add_layer {right_layer} 0 0, , "] + CLEANUP_REMOVALS
-    
-    return OrderedDict([
-        ("left_bumper", OrderedDict([
-            ("activators", OrderedDict([
-                ("Full_Press", OrderedDict([
-                    ("bindings", OrderedDict([
-                        ("binding", left_bindings)
-                    ])),
-                    ("settings", OrderedDict([
-                        ("hold_repeats", "1"),
-                        ("interruptable", "0")
-                    ]))
-                ]))
-            ])),
-            ("disabled_activators", OrderedDict())
-        ])),
-        ("right_bumper", OrderedDict([
-            ("activators", OrderedDict([
-                ("Full_Press", OrderedDict([
-                    ("bindings", OrderedDict([
-                        ("binding", right_bindings)
-                    ])),
-                    ("settings", OrderedDict([
-                        ("hold_repeats", "1"),
-                        ("interruptable", "0")
-                    ]))
-                ]))
-            ])),
-            ("disabled_activators", OrderedDict())
-        ]))
-    ])
-
-
-def create_bumper_inputs_chord(left_layer: str, right_layer: str) -> OrderedDict:
+    return {
+        "left_bumper": {
+            "activators": {
+                "Full_Press": {
+                    "bindings": {
+                        "binding": list(left_bindings)
+                    },
+                    "settings": {
+                        "hold_repeats": "1",
+                        "interruptable": "0"
+                    }
+                }
+            },
+            "disabled_activators": {}
+        },
+        "right_bumper": {
+            "activators": {
+                "Full_Press": {
+                    "bindings": {
+                        "binding": list(right_bindings)
+                    },
+                    "settings": {
+                        "hold_repeats": "1",
+                        "interruptable": "0"
+                    }
+                }
+            },
+            "disabled_activators": {}
+        }
+    }
+
+
+def create_bumper_inputs_chord(left_binding: str, right_binding: str) -> Dict[str, Any]:
     """Create the bumper input structures for modifiers using chord activator."""
     # Modifiers use chord activator with chord_button: 1 for left, 2 for right
-    return OrderedDict([
-        ("left_bumper", OrderedDict([
-            ("activators", OrderedDict([
-                ("chord", OrderedDict([
-                    ("bindings", OrderedDict([
-                        ("binding", f"controller_action add_layer {left_layer} 0 0, , ")
-                    ])),
-                    ("settings", OrderedDict([
-                        ("chord_button", "1"),
-                        ("hold_repeats", "1"),
-                        ("interruptable", "0")
-                    ]))
-                ]))
-            ])),
-            ("disabled_activators", OrderedDict())
-        ])),
-        ("right_bumper", OrderedDict([
-            ("activators", OrderedDict([
-                ("chord", OrderedDict([
-                    ("bindings", OrderedDict([
-                        ("binding", f"controller_action add_layer {right_layer} 0 0, , ")
-                    ])),
-                    ("settings", OrderedDict([
-                        ("chord_button", "2"),
-                        ("hold_repeats", "1"),
-                        ("interruptable", "0")
-                    ]))
-                ]))
-            ])),
-            ("disabled_activators", OrderedDict())
-        ]))
-    ])
-
-
-def create_joystick_edge_input() -> OrderedDict:
+    return {
+        "left_bumper": {
+            "activators": {
+                "chord": {
+                    "bindings": {
+                        "binding": left_binding
+                    },
+                    "settings": {
+                        "chord_button": "1",
+                        "hold_repeats": "1",
+                        "interruptable": "0"
+                    }
+                }
+            },
+            "disabled_activators": {}
+        },
+        "right_bumper": {
+            "activators": {
+                "chord": {
+                    "bindings": {
+                        "binding": right_binding
+                    },
+                    "settings": {
+                        "chord_button": "2",
+                        "hold_repeats": "1",
+                        "interruptable": "0"
+                    }
+                }
+            },
+            "disabled_activators": {}
+        }
+    }
+
+
+def create_joystick_edge_input() -> Dict[str, Any]:
     """Create the edge input structure for a joystick group with Gyro Turning Ramp Up."""
-    bindings = [
-        "controller_action add_layer {{Base::Gyro Off}} 0 0, , ",
-        "controller_action add_layer {{Base::(Gyro) Turning Ramp Up 0}} 0 0, , "
-    ]
-    
-    return OrderedDict([
-        ("edge", OrderedDict([
-            ("activators", OrderedDict([
-                ("Soft_Press", OrderedDict([
-                    ("bindings", OrderedDict([
-                        ("binding", bindings)
-                    ])),
-                    ("settings", OrderedDict([
-                        ("hold_repeats", "1"),
-                        ("haptic_intensity", "0"),
-                        ("activation_threshold", "32255")
-                    ]))
-                ]))
-            ])),
-            ("disabled_activators", OrderedDict())
-        ]))
-    ])
+    return {
+        "edge": {
+            "activators": {
+                "Soft_Press": {
+                    "bindings": {
+                        "binding": list(GYRO_JOYSTICK_EDGE_BINDINGS)
+                    },
+                    "settings": {
+                        "hold_repeats": "1",
+                        "haptic_intensity": "0",
+                        "activation_threshold": "32255"
+                    }
+                }
+            },
+            "disabled_activators": {}
+        }
+    }
+
+
+def index_group_positions(groups: List[Dict]) -> Dict[Any, List[int]]:
+    """Map each group ID to the positions of the groups carrying it."""
+    group_positions = {}
+    for position, group in enumerate(groups):
+        group_positions.setdefault(group.get("id"), []).append(position)
+    return group_positions
+
+
+def find_groups_by_ids(groups: List[Dict], group_positions: Dict[Any, List[int]],
+                       group_ids: Set[str]) -> List[Dict]:
+    """Find all groups matching the given IDs, in their order within groups."""
+    positions = sorted(
+        position
+        for group_id in group_ids
+        for position in group_positions.get(group_id, ())
+    )
+    return [groups[position] for position in positions]
+
+
+def build_inputs_template(inputs: Dict[str, Any]) -> bytes:
+    """Serialize a built inputs structure once so each assignment only has to parse it."""
+    return json.dumps(inputs, ensure_ascii=False).encode()
+
+
+def instantiate_inputs_template(template: bytes) -> Dict[str, Any]:
+    """Parse a fresh, unshared copy of an inputs template (orjson when installed)."""
+    return orjson.loads(template) if orjson is not None else json.loads(template)
+
+
+# The joystick inputs are identical in both layouts, so share one template
+JOYSTICK_EDGE_INPUT_TEMPLATE = build_inputs_template(create_joystick_edge_input())
+
+# Per-layout dispatch from group ID to (report description, serialized inputs template);
+# every template is built once at import and parsed into a fresh dict per group populated
+DEFAULT_GROUP_POPULATORS = {
+    # Trigger groups add (Gyro) L2 / (Gyro) R2 on click
+    GYRO_LAYER_GROUPS["trigger_left"]: (
+        "(left trigger) with (Gyro) L2 binding",
+        build_inputs_template(create_trigger_click_input(GYRO_L2_TRIGGER_BINDINGS))
+    ),
+    GYRO_LAYER_GROUPS["trigger_right"]: (
+        "(right trigger) with (Gyro) R2 binding",
+        build_inputs_template(create_trigger_click_input(GYRO_R2_TRIGGER_BINDINGS))
+    ),
+    # Switches group adds (Gyro) L1: Modifier 0 / (Gyro) R1: Modifier 1 on bumpers (chord)
+    GYRO_LAYER_GROUPS["switches"]: (
+        "(switches) with (Gyro) L1/R1 Modifier chord bindings",
+        build_inputs_template(create_bumper_inputs_chord(GYRO_L1_MODIFIER_0_BINDING, GYRO_R1_MODIFIER_1_BINDING))
+    ),
+    GYRO_LAYER_GROUPS["joystick"]: (
+        "(joystick) with (Gyro) Turning Ramp Up binding",
+        JOYSTICK_EDGE_INPUT_TEMPLATE
+    ),
+}
+
+ALTERNATIVE_GROUP_POPULATORS = {
+    # Switches group adds (Gyro) L1 / (Gyro) R1 on bumpers (triggers in alternative)
+    GYRO_LAYER_GROUPS["switches"]: (
+        "(switches) with (Gyro) L1/R1 trigger bindings",
+        build_inputs_template(create_bumper_inputs_full_press(GYRO_L1_TRIGGER_BINDINGS, GYRO_R1_TRIGGER_BINDINGS))
+    ),
+    # Trigger groups add (Gyro) L2: Modifier 0 / (Gyro) R2: Modifier 1 on edge (modifiers in alternative)
+    GYRO_LAYER_GROUPS["trigger_left"]: (
+        "(left trigger) with (Gyro) L2: Modifier 0 binding",
+        build_inputs_template(create_trigger_edge_input(GYRO_L2_MODIFIER_0_BINDING))
+    ),
+    GYRO_LAYER_GROUPS["trigger_right"]: (
+        "(right trigger) with (Gyro) R2: Modifier 1 binding",
+        build_inputs_template(create_trigger_edge_input(GYRO_R2_MODIFIER_1_BINDING))
+    ),
+    GYRO_LAYER_GROUPS["joystick"]: (
+        "(joystick) with (Gyro) Turning Ramp Up binding",
+        JOYSTICK_EDGE_INPUT_TEMPLATE
+    ),
+}
 
 
 def process_file(file_path: str, dry_run: bool = False) -> Dict[str, int]:
     """Process a single JSON file."""
     print(f"\nProcessing: {file_path}")
     
-    # Determine layout type
-    is_alt = is_alternative_layout(file_path)
+    # Determine layout type once; the group loop below only checks the flag
+    is_alt = "alternative" in os.path.basename(file_path).lower()
     layout_type = "alternative" if is_alt else "default"
     print(f"  Layout type: {layout_type}")
     
-    # Load the file
-    data = load_json_file(file_path)
-    
-    # Get groups
-    cm = data.get("controller_mappings", data)
-    groups = cm.get("group", [])
-    
     # Track statistics
     stats = {
         "groups_modified": 0
     }
     
-    modified = False
+    # Load the file, only parsing it when one of the group IDs appears in the raw bytes
+    content = load_file_bytes(file_path)
+    if GYRO_LAYER_GROUP_IDS_BYTES_RE.search(content) is None:
+        print(f"  No changes needed (groups already populated or not found)")
+        return stats
+    data = parse_json_bytes(file_path, content)
     
-    for group in groups:
+    # Get groups
+    cm = data.get("controller_mappings", data)
+    groups = cm.get("group", [])
+    
+    # Index the groups once, then only visit the few Gyro layer groups for this layout
+    populators = ALTERNATIVE_GROUP_POPULATORS if is_alt else DEFAULT_GROUP_POPULATORS
+    group_positions = index_group_positions(groups)
+    
+    for group in find_groups_by_ids(groups, group_positions, populators.keys() & group_positions.keys()):
         group_id = group.get("id")
+        populator = populators[group_id]
         
-        # === DEFAULT LAYOUT ===
-        if not is_alt:
-            # Trigger groups add (Gyro) L2 / (Gyro) R2 on click
-            if group_id == GYRO_LAYER_GROUPS["trigger_left"]:
-                if not group.get("inputs") or group.get("inputs") == {}:
-                    print(f"  Populating group {group_id} (left trigger) with (Gyro) L2 binding")
-                    group["inputs"] = create_trigger_click_input("{{Base::(Gyro) L2}}")
-                    stats["groups_modified"] += 1
-                    modified = True
-            
-            if group_id == GYRO_LAYER_GROUPS["trigger_right"]:
-                if not group.get("inputs") or group.get("inputs") == {}:
-                    print(f"  Populating group {group_id} (right trigger) with (Gyro) R2 binding")
-                    group["inputs"] = create_trigger_click_input("{{Base::(Gyro) R2}}")
-                    stats["groups_modified"] += 1
-                    modified = True
-            
-            # Switches group adds (Gyro) L1: Modifier 0 / (Gyro) R1: Modifier 1 on bumpers (chord)
-            if group_id == GYRO_LAYER_GROUPS["switches"]:
-                if not group.get("inputs") or group.get("inputs") == {}:
-                    print(f"  Populating group {group_id} (switches) with (Gyro) L1/R1 Modifier chord bindings")
-                    group["inputs"] = create_bumper_inputs_chord(
-                        "{{Base::(Gyro) L1: Modifier 0}}",
-                        "{{Base::(Gyro) R1: Modifier 1}}"
-                    )
-                    stats["groups_modified"] += 1
-                    modified = True
-        
-        # === ALTERNATIVE LAYOUT ===
-        else:
-            # Switches group adds (Gyro) L1 / (Gyro) R1 on bumpers (triggers in alternative)
-            if group_id == GYRO_LAYER_GROUPS["switches"]:
-                if not group.get("inputs") or group.get("inputs") == {}:
-                    print(f"  Populating group {group_id} (switches) with (Gyro) L1/R1 trigger bindings")
-                    group["inputs"] = create_bumper_inputs_full_press(
-                        "{{Base::(Gyro) L1}}",
-                        "{{Base::(Gyro) R1}}"
-                    )
-                    stats["groups_modified"] += 1
-                    modified = True
-            
-            # Trigger groups add (Gyro) L2: Modifier 0 / (Gyro) R2: Modifier 1 on edge (modifiers in alternative)
-            if group_id == GYRO_LAYER_GROUPS["trigger_left"]:
-                if not group.get("inputs") or group.get("inputs") == {}:
-                    print(f"  Populating group {group_id} (left trigger) with (Gyro) L2: Modifier 0 binding")
-                    group["inputs"] = create_trigger_edge_input("{{Base::(Gyro) L2: Modifier 0}}")
-                    stats["groups_modified"] += 1
-                    modified = True
-            
-            if group_id == GYRO_LAYER_GROUPS["trigger_right"]:
-                if not group.get("inputs") or group.get("inputs") == {}:
-                    print(f"  Populating group {group_id} (right trigger) with (Gyro) R2: Modifier 1 binding")
-                    group["inputs"] = create_trigger_edge_input("{{Base::(Gyro) R2: Modifier 1}}")
-                    stats["groups_modified"] += 1
-                    modified = True
-        
-        # === BOTH LAYOUTS ===
-        # Process joystick group for both layouts
-        if group_id == GYRO_LAYER_GROUPS["joystick"]:
-            if not group.get("inputs") or group.get("inputs") == {}:
-                print(f"  Populating group {group_id} (joystick) with (Gyro) Turning Ramp Up binding")
-                group["inputs"] = create_joystick_edge_input()
-                stats["groups_modified"] += 1
-                modified = True
+        # An empty inputs dict is falsy, same as a missing one
+        if not group.get("inputs"):
+            description, template = populator
+            print(f"  Populating group {group_id} {description}")
+            group["inputs"] = instantiate_inputs_template(template)
+            stats["groups_modified"] += 1
     
     # Report results
     if stats["groups_modified"] > 0:
@@ -315,26 +330,13 @@ def process_file(file_path: str, dry_run: bool = False) -> Dict[str, int]:
         if dry_run:
             print(f"  [DRY RUN] Would save changes to: {file_path}")
         else:
-            save_json_file(file_path, data)
+            save_json_file(file_path, data, content)
     else:
         print(f"  No changes needed (groups already populated or not found)")
     
     return stats
 
 
-def find_neptune_json_files() -> List[str]:
-    """Find all JSON files in the neptune/ directory."""
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    neptune_dir = os.path.join(script_dir, "neptune")
-    
-    if not os.path.isdir(neptune_dir):
-        print(f"Error: neptune/ directory not found at {neptune_dir}")
-        sys.exit(1)
-    
-    json_files = glob.glob(os.path.join(neptune_dir, "*.json"))
-    return sorted(json_files)
-
-
 def main():
     parser = argparse.ArgumentParser(
         description="Populate Gyro layer inputs with gyro trigger and ramp up bindings"
@@ -385,8 +387,7 @@ def main():
         "total_groups_modified": 0
     }
     
-    for file_path in files_to_process:
-        stats = process_file(file_path, args.dry_run)
+    for stats in process_files(process_file, files_to_process, args.dry_run):
         total_stats["files_processed"] += 1
         if stats["groups_modified"] > 0:
             total_stats["files_modified"] += 1
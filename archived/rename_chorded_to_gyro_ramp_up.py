@@ -24,11 +24,14 @@ Usage:
 import json
 import sys
 import os
-import glob
 import re
 import argparse
-from collections import OrderedDict
-from typing import Dict, Any, List, Tuple
+from typing import Dict, Any, Match
+
+from _jsonio import (
+    orjson, load_file_bytes, parse_json_bytes, save_json_file, find_neptune_json_files,
+    process_files,
+)
 
 # Layer title renames
 TITLE_RENAMES = {
@@ -42,9 +45,17 @@ REFERENCE_RENAMES = {
     "{{Base::Chorded Ramp Up 1}}": "{{Base::(Gyro) Turning Ramp Up 1}}",
 }
 
+# The same renames as UTF-8 bytes, for rewriting serialized JSON
+REFERENCE_RENAMES_BYTES = {
+    old.encode(): new.encode() for old, new in REFERENCE_RENAMES.items()
+}
+
+# One alternation over every renamed reference, so a single scan finds them all
+REFERENCE_RENAMES_BYTES_RE = re.compile(b"|".join(map(re.escape, REFERENCE_RENAMES_BYTES)))
+
 # Non-gyro trigger layers by layout type
 # These layers should have their chord activators changed to add plain Turning Ramp Up
-DEFAULT_NON_GYRO_TRIGGER_LAYERS = ["Preset_1000006", "Preset_1000007"]  # L2, R2
+DEFAULT_NON_GYRO_TRIGGER_LAYERS = frozenset({"Preset_1000006", "Preset_1000007"})  # L2, R2
 ALTERNATIVE_NON_GYRO_TRIGGER_LAYERS = ["Preset_1000008", "Preset_1000005"]  # L1: Modifier 0, R1: Modifier 1 (which are actually the trigger layers in alternative)
 
 # For non-gyro trigger layers, change gyro ramp up back to plain ramp up
@@ -52,37 +63,15 @@ NON_GYRO_CHORD_CHANGES = {
     "{{Base::(Gyro) Turning Ramp Up 0}}": "{{Base::Turning Ramp Up 0}}",
     "{{Base::(Gyro) Turning Ramp Up 1}}": "{{Base::Turning Ramp Up 1}}",
 }
+NON_GYRO_CHORD_CHANGES_RE = re.compile("|".join(map(re.escape, NON_GYRO_CHORD_CHANGES)))
 
-
-def load_json_file(file_path: str) -> Dict[str, Any]:
-    """Load and parse a JSON file, preserving key order."""
-    try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            return json.load(f, object_pairs_hook=OrderedDict)
-    except FileNotFoundError:
-        print(f"Error: File '{file_path}' not found.")
-        sys.exit(1)
-    except json.JSONDecodeError as e:
-        print(f"Error: Invalid JSON in file '{file_path}': {e}")
-        sys.exit(1)
-
-
-def save_json_file(file_path: str, data: Dict[str, Any]) -> None:
-    """Save data to a JSON file with proper formatting."""
-    try:
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent='\t', ensure_ascii=False)
-        print(f"  Saved: {file_path}")
-    except Exception as e:
-        print(f"Error saving file: {e}")
-        sys.exit(1)
-
-
-def detect_layout_type(file_path: str) -> str:
-    """Detect if this is a default or alternative layout based on filename."""
-    if "alternative" in file_path.lower():
-        return "alternative"
-    return "default"
+# Anything any of the three steps could act on, as it appears in the raw file.
+# None of it contains characters json escapes, so a file without a match has
+# nothing to change and need not be parsed
+WORK_BYTES_RE = re.compile(b"|".join(
+    re.escape(text.encode())
+    for text in (*TITLE_RENAMES, *REFERENCE_RENAMES, *NON_GYRO_CHORD_CHANGES)
+))
 
 
 def rename_layer_titles(data: Dict[str, Any], stats: Dict[str, int]) -> None:
@@ -97,84 +86,56 @@ def rename_layer_titles(data: Dict[str, Any], stats: Dict[str, int]) -> None:
             print(f"    Renamed title: '{title}' -> '{TITLE_RENAMES[title]}'")
 
 
-def replace_references_in_string(s: str, stats: Dict[str, int]) -> str:
-    """Replace Chorded Ramp Up references in a string."""
-    modified = s
-    for old, new in REFERENCE_RENAMES.items():
-        if old in modified:
-            modified = modified.replace(old, new)
-            stats["references_replaced"] += 1
-    return modified
-
-
 def replace_references_in_object(obj: Any, stats: Dict[str, int]) -> Any:
-    """Recursively replace references in an object."""
-    if isinstance(obj, str):
-        return replace_references_in_string(obj, stats)
-    elif isinstance(obj, dict):
-        new_obj = OrderedDict() if isinstance(obj, OrderedDict) else {}
-        for key, value in obj.items():
-            new_obj[key] = replace_references_in_object(value, stats)
-        return new_obj
-    elif isinstance(obj, list):
-        return [replace_references_in_object(item, stats) for item in obj]
-    else:
+    """
+    Replace references throughout an object in one pass over its serialized JSON.
+    
+    The references contain nothing JSON escapes and only ever appear in string
+    values, so rewriting the compact serialization is equivalent to visiting
+    every string, without walking or rebuilding the tree in Python. The object
+    is returned as is when nothing needs replacing.
+    """
+    blob = orjson.dumps(obj) if orjson is not None else json.dumps(obj, ensure_ascii=False).encode()
+    
+    blob, count = REFERENCE_RENAMES_BYTES_RE.subn(
+        lambda match: REFERENCE_RENAMES_BYTES[match.group(0)], blob
+    )
+    if not count:
         return obj
+    stats["references_replaced"] += count
+    return orjson.loads(blob) if orjson is not None else json.loads(blob)
 
 
-def get_non_gyro_trigger_groups(data: Dict[str, Any], layout_type: str) -> List[str]:
-    """Get the group IDs used by non-gyro trigger layers."""
-    presets = data.get("controller_mappings", {}).get("preset", [])
-    
-    if layout_type == "default":
-        trigger_layers = DEFAULT_NON_GYRO_TRIGGER_LAYERS
-    else:
-        # For alternative, L1/R1 are the triggers
-        # Need to find the actual preset names for L1 and R1 trigger layers
-        trigger_layers = []
-        action_layers = data.get("controller_mappings", {}).get("action_layers", {})
-        for preset_id, layer_data in action_layers.items():
-            title = layer_data.get("title", "")
-            # In alternative, L1 and R1 are the trigger layers
-            if title in ["L1", "R1"]:
-                trigger_layers.append(preset_id)
-    
-    group_ids = []
-    for preset in presets:
-        if preset.get("name") in trigger_layers:
-            gsb = preset.get("group_source_bindings", {})
-            for group_id, binding in gsb.items():
-                if "right_joystick active" in binding:
-                    group_ids.append(group_id)
-    
-    return group_ids
+def replace_non_gyro_chord(match: Match[str]) -> str:
+    """Substitution callback for NON_GYRO_CHORD_CHANGES_RE."""
+    return NON_GYRO_CHORD_CHANGES[match.group(0)]
 
 
-def change_non_gyro_chord_activators(data: Dict[str, Any], layout_type: str, stats: Dict[str, int]) -> None:
+def change_non_gyro_chord_activators(data: Dict[str, Any], is_alt: bool, stats: Dict[str, int]) -> None:
     """Change chord activators in non-gyro trigger layers to add plain Turning Ramp Up."""
-    groups = data.get("controller_mappings", {}).get("group", [])
-    presets = data.get("controller_mappings", {}).get("preset", [])
+    controller_mappings = data.get("controller_mappings", {})
+    groups = controller_mappings.get("group", [])
+    presets = controller_mappings.get("preset", [])
     
-    # Get the right_joystick group IDs for non-gyro trigger layers
-    if layout_type == "default":
+    # Get the preset IDs of the non-gyro trigger layers
+    if not is_alt:
         trigger_layer_names = DEFAULT_NON_GYRO_TRIGGER_LAYERS
     else:
-        # For alternative, find L1 and R1 layer preset IDs
-        trigger_layer_names = []
-        action_layers = data.get("controller_mappings", {}).get("action_layers", {})
-        for preset_id, layer_data in action_layers.items():
-            title = layer_data.get("title", "")
-            if title in ["L1", "R1"]:
-                trigger_layer_names.append(preset_id)
+        # For alternative, L1 and R1 are the trigger layers
+        trigger_layer_names = {
+            preset_id
+            for preset_id, layer_data in controller_mappings.get("action_layers", {}).items()
+            if layer_data.get("title", "") in ("L1", "R1")
+        }
     
-    # Find the right_joystick group IDs for these layers
-    target_group_ids = set()
-    for preset in presets:
-        if preset.get("name") in trigger_layer_names:
-            gsb = preset.get("group_source_bindings", {})
-            for group_id, binding in gsb.items():
-                if "right_joystick active" in binding:
-                    target_group_ids.add(group_id)
+    # Find the right_joystick group IDs for these layers in one pass over the presets
+    target_group_ids = {
+        group_id
+        for preset in presets
+        if preset.get("name") in trigger_layer_names
+        for group_id, binding in preset.get("group_source_bindings", {}).items()
+        if "right_joystick active" in binding
+    }
     
     print(f"    Non-gyro trigger layer right_joystick groups: {target_group_ids}")
     
@@ -197,24 +158,22 @@ def change_non_gyro_chord_activators(data: Dict[str, Any], layout_type: str, sta
         bindings = chord.get("bindings", {})
         binding = bindings.get("binding", "")
         
-        # Check if this is adding a gyro turning ramp up
+        # Check if this is adding a gyro turning ramp up; one scan per binding
+        # string covers every entry in NON_GYRO_CHORD_CHANGES
         modified = False
         if isinstance(binding, str):
-            for old, new in NON_GYRO_CHORD_CHANGES.items():
-                if old in binding:
-                    bindings["binding"] = binding.replace(old, new)
-                    modified = True
-                    stats["chord_activators_changed"] += 1
-                    print(f"    Group {group.get('id')}: chord changed to add plain Turning Ramp Up")
+            new_binding, count = NON_GYRO_CHORD_CHANGES_RE.subn(replace_non_gyro_chord, binding)
+            if count:
+                bindings["binding"] = new_binding
+                stats["chord_activators_changed"] += count
+                print(f"    Group {group.get('id')}: chord changed to add plain Turning Ramp Up")
         elif isinstance(binding, list):
             new_bindings = []
             for b in binding:
-                new_b = b
-                for old, new in NON_GYRO_CHORD_CHANGES.items():
-                    if old in b:
-                        new_b = b.replace(old, new)
-                        modified = True
-                        stats["chord_activators_changed"] += 1
+                new_b, count = NON_GYRO_CHORD_CHANGES_RE.subn(replace_non_gyro_chord, b)
+                if count:
+                    modified = True
+                    stats["chord_activators_changed"] += count
                 new_bindings.append(new_b)
             if modified:
                 bindings["binding"] = new_bindings
@@ -225,12 +184,9 @@ def process_file(file_path: str, dry_run: bool = False) -> Dict[str, int]:
     """Process a single JSON file."""
     print(f"\nProcessing: {file_path}")
     
-    # Detect layout type
-    layout_type = detect_layout_type(file_path)
-    print(f"  Layout type: {layout_type}")
-    
-    # Load the file
-    data = load_json_file(file_path)
+    # Detect layout type once from the filename
+    is_alt = "alternative" in file_path.lower()
+    print(f"  Layout type: {'alternative' if is_alt else 'default'}")
     
     # Track statistics
     stats = {
@@ -239,6 +195,13 @@ def process_file(file_path: str, dry_run: bool = False) -> Dict[str, int]:
         "chord_activators_changed": 0
     }
     
+    # Load the file, only parsing it when something to change appears in the raw bytes
+    content = load_file_bytes(file_path)
+    if WORK_BYTES_RE.search(content) is None:
+        print(f"  No changes needed")
+        return stats
+    data = parse_json_bytes(file_path, content)
+    
     # Step 1: Rename layer titles
     print("  Step 1: Renaming layer titles...")
     rename_layer_titles(data, stats)
@@ -249,7 +212,7 @@ def process_file(file_path: str, dry_run: bool = False) -> Dict[str, int]:
     
     # Step 3: Change non-gyro trigger layer chord activators
     print("  Step 3: Changing non-gyro trigger layer chord activators...")
-    change_non_gyro_chord_activators(data, layout_type, stats)
+    change_non_gyro_chord_activators(data, is_alt, stats)
     
     # Report results
     total_changes = sum(stats.values())
@@ -262,26 +225,13 @@ def process_file(file_path: str, dry_run: bool = False) -> Dict[str, int]:
         if dry_run:
             print(f"  [DRY RUN] Would save changes to: {file_path}")
         else:
-            save_json_file(file_path, data)
+            save_json_file(file_path, data, content)
     else:
         print(f"  No changes needed")
     
     return stats
 
 
-def find_neptune_json_files() -> List[str]:
-    """Find all JSON files in the neptune/ directory."""
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    neptune_dir = os.path.join(script_dir, "neptune")
-    
-    if not os.path.isdir(neptune_dir):
-        print(f"Error: neptune/ directory not found at {neptune_dir}")
-        sys.exit(1)
-    
-    json_files = glob.glob(os.path.join(neptune_dir, "*.json"))
-    return sorted(json_files)
-
-
 def main():
     parser = argparse.ArgumentParser(
         description="Rename Chorded Ramp Up to (Gyro) Turning Ramp Up"
@@ -329,8 +279,7 @@ def main():
         "total_chord_changes": 0
     }
     
-    for file_path in files_to_process:
-        stats = process_file(file_path, args.dry_run)
+    for stats in process_files(process_file, files_to_process, args.dry_run):
         total_stats["files_processed"] += 1
         if sum(stats.values()) > 0:
             total_stats["files_modified"] += 1
@@ -24,13 +24,16 @@ Usage:
     python3 sync_turning_to_chorded.py --dry-run          # Preview changes without modifying
 """
 
-import json
 import sys
 import os
-import glob
+import re
 import argparse
-from collections import OrderedDict
-from typing import Dict, Any, List, Tuple, Optional
+from functools import partial
+from typing import Dict, Any, List
+
+from _jsonio import (
+    load_file_bytes, parse_json_bytes, save_json_file, find_neptune_json_files, process_files
+)
 
 # Group IDs for each layer
 TURNING_RAMP_UP_0_GROUPS = {
@@ -53,59 +56,41 @@ TURNING_RAMP_UP_1_GROUPS = {
     "joystick": "738"
 }
 
-# Layers to remove based on layout type
-DEFAULT_TRIGGER_LAYERS_TO_REMOVE = [
+# The quoted trigger and switches group IDs as they appear in the raw file; json
+# never escapes digits, so a file without any of these has nothing to sync
+SYNCED_GROUP_IDS_BYTES_RE = re.compile(b"|".join(
+    b'"' + groups[name].encode() + b'"'
+    for groups in (TURNING_RAMP_UP_0_GROUPS, TURNING_RAMP_UP_1_GROUPS)
+    for name in ("left_trigger", "right_trigger", "switches")
+))
+
+# Layers to remove based on layout type; interned, since the same string
+# objects are inserted into every binding list they are added to
+DEFAULT_TRIGGER_LAYERS_TO_REMOVE = [sys.intern(removal) for removal in (
     "controller_action remove_layer {{Base::L2}} 0 0, , ",
     "controller_action remove_layer {{Base::(Gyro) L2}} 0 0, , ",
     "controller_action remove_layer {{Base::R2}} 0 0, , ",
     "controller_action remove_layer {{Base::(Gyro) R2}} 0 0, , "
-]
+)]
 
-ALTERNATIVE_TRIGGER_LAYERS_TO_REMOVE = [
+ALTERNATIVE_TRIGGER_LAYERS_TO_REMOVE = [sys.intern(removal) for removal in (
     "controller_action remove_layer {{Base::L1}} 0 0, , ",
     "controller_action remove_layer {{Base::(Gyro) L1}} 0 0, , ",
     "controller_action remove_layer {{Base::R1}} 0 0, , ",
     "controller_action remove_layer {{Base::(Gyro) R1}} 0 0, , "
-]
-
-
-def load_json_file(file_path: str) -> Dict[str, Any]:
-    """Load and parse a JSON file, preserving key order."""
-    try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            return json.load(f, object_pairs_hook=OrderedDict)
-    except FileNotFoundError:
-        print(f"Error: File '{file_path}' not found.")
-        sys.exit(1)
-    except json.JSONDecodeError as e:
-        print(f"Error: Invalid JSON in file '{file_path}': {e}")
-        sys.exit(1)
-
-
-def save_json_file(file_path: str, data: Dict[str, Any]) -> None:
-    """Save data to a JSON file with proper formatting."""
-    try:
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent='\t', ensure_ascii=False)
-        print(f"  Saved: {file_path}")
-    except Exception as e:
-        print(f"Error saving file: {e}")
-        sys.exit(1)
-
-
-def detect_layout_type(file_path: str) -> str:
-    """Detect if this is a default or alternative layout based on filename."""
-    if "alternative" in file_path.lower():
-        return "alternative"
-    return "default"
-
-
-def find_group_by_id(groups: List[Dict], group_id: str) -> Optional[Dict]:
-    """Find a group by its ID."""
+)]
+
+# Markers for locating where trigger removals are inserted into a binding list
+GYRO_OFF_REMOVAL_MARKER = "remove_layer {{Base::Gyro Off}}"
+RAMP_UP_REMOVAL_MARKER = "remove_layer {{Base::Turning Ramp Up"
+
+
+def index_groups_by_id(groups: List[Dict]) -> Dict[Any, Dict]:
+    """Map each group ID to its group, keeping the first group for a repeated ID."""
+    groups_by_id = {}
     for group in groups:
-        if group.get("id") == group_id:
-            return group
-    return None
+        groups_by_id.setdefault(group.get("id"), group)
+    return groups_by_id
 
 
 def make_trigger_empty(group: Dict, stats: Dict) -> bool:
@@ -165,6 +150,22 @@ def make_switches_empty(group: Dict, stats: Dict) -> bool:
     return modified
 
 
+def find_removal_insert_index(binding: List[str]) -> int:
+    """
+    Find where trigger removals go in a binding list, in a single pass.
+    
+    That is just after the first Gyro Off removal, or failing that just after
+    the last Turning Ramp Up removal, or failing both the start of the list.
+    """
+    after_ramp_up = 0
+    for i, b in enumerate(binding):
+        if GYRO_OFF_REMOVAL_MARKER in b:
+            return i + 1
+        if RAMP_UP_REMOVAL_MARKER in b:
+            after_ramp_up = i + 1
+    return after_ramp_up
+
+
 def add_trigger_removals_to_switches(group: Dict, trigger_layers: List[str], stats: Dict) -> bool:
     """Add trigger layer removal commands to switches group bumper inputs."""
     if "inputs" not in group:
@@ -196,33 +197,24 @@ def add_trigger_removals_to_switches(group: Dict, trigger_layers: List[str], sta
         if isinstance(binding, str):
             binding = [binding]
         
-        # Check if trigger removals already exist
-        has_all_removals = all(
-            any(removal in b for b in binding)
+        # Check if trigger removals already exist; the common all-exact case is one
+        # C-level superset test, and only removals missing from the set fall back
+        # to a substring scan
+        existing = set(binding)
+        has_all_removals = existing.issuperset(trigger_layers) or all(
+            removal in existing or any(removal in b for b in binding)
             for removal in trigger_layers
         )
         
         if has_all_removals:
             continue
         
-        # Find the position after "remove Gyro Off" to insert trigger removals
-        insert_index = None
-        for i, b in enumerate(binding):
-            if "remove_layer {{Base::Gyro Off}}" in b:
-                insert_index = i + 1
-                break
-        
-        if insert_index is None:
-            # If no Gyro Off found, insert after the ramp up removals
-            for i, b in enumerate(binding):
-                if "remove_layer {{Base::Turning Ramp Up" in b:
-                    insert_index = i + 1
-            if insert_index is None:
-                insert_index = 0
+        # Insert after "remove Gyro Off", else after the ramp up removals
+        insert_index = find_removal_insert_index(binding)
         
         # Insert the trigger layer removals
         for j, removal in enumerate(trigger_layers):
-            if removal not in binding:
+            if removal not in existing:
                 binding.insert(insert_index + j, removal)
                 modified = True
         
@@ -262,34 +254,25 @@ def add_trigger_removals_to_triggers(group: Dict, trigger_layers: List[str], sta
     if isinstance(binding, str):
         binding = [binding]
     
-    # Check if trigger removals already exist
-    has_all_removals = all(
-        any(removal in b for b in binding)
+    # Check if trigger removals already exist; the common all-exact case is one
+    # C-level superset test, and only removals missing from the set fall back
+    # to a substring scan
+    existing = set(binding)
+    has_all_removals = existing.issuperset(trigger_layers) or all(
+        removal in existing or any(removal in b for b in binding)
         for removal in trigger_layers
     )
     
     if has_all_removals:
         return False
     
-    # Find the position after "remove Gyro Off" to insert trigger removals
-    insert_index = None
-    for i, b in enumerate(binding):
-        if "remove_layer {{Base::Gyro Off}}" in b:
-            insert_index = i + 1
-            break
-    
-    if insert_index is None:
-        # If no Gyro Off found, insert after the ramp up removals
-        for i, b in enumerate(binding):
-            if "remove_layer {{Base::Turning Ramp Up" in b:
-                insert_index = i + 1
-        if insert_index is None:
-            insert_index = 0
+    # Insert after "remove Gyro Off", else after the ramp up removals
+    insert_index = find_removal_insert_index(binding)
     
     # Insert the trigger layer removals
     modified = False
     for j, removal in enumerate(trigger_layers):
-        if removal not in binding:
+        if removal not in existing:
             binding.insert(insert_index + j, removal)
             modified = True
     
@@ -299,17 +282,56 @@ def add_trigger_removals_to_triggers(group: Dict, trigger_layers: List[str], sta
     
     return modified
 
+# Per-layout dispatch from group ID to the action applied to that group, in the
+# order the groups are processed; every action is called as action(group, stats=...)
+DEFAULT_GROUP_ACTIONS = {
+    # Default: L2/R2 are triggers (make empty), L1/R1 are modifiers (add trigger removal)
+    TURNING_RAMP_UP_0_GROUPS["left_trigger"]: make_trigger_empty,
+    TURNING_RAMP_UP_0_GROUPS["right_trigger"]: make_trigger_empty,
+    TURNING_RAMP_UP_0_GROUPS["switches"]: partial(
+        add_trigger_removals_to_switches, trigger_layers=DEFAULT_TRIGGER_LAYERS_TO_REMOVE
+    ),
+    TURNING_RAMP_UP_1_GROUPS["left_trigger"]: make_trigger_empty,
+    TURNING_RAMP_UP_1_GROUPS["right_trigger"]: make_trigger_empty,
+    TURNING_RAMP_UP_1_GROUPS["switches"]: partial(
+        add_trigger_removals_to_switches, trigger_layers=DEFAULT_TRIGGER_LAYERS_TO_REMOVE
+    ),
+}
+
+ALTERNATIVE_GROUP_ACTIONS = {
+    # Alternative: L1/R1 are triggers (make switches empty), L2/R2 are modifiers (add trigger removal)
+    TURNING_RAMP_UP_0_GROUPS["switches"]: make_switches_empty,
+    TURNING_RAMP_UP_0_GROUPS["left_trigger"]: partial(
+        add_trigger_removals_to_triggers, trigger_layers=ALTERNATIVE_TRIGGER_LAYERS_TO_REMOVE
+    ),
+    TURNING_RAMP_UP_0_GROUPS["right_trigger"]: partial(
+        add_trigger_removals_to_triggers, trigger_layers=ALTERNATIVE_TRIGGER_LAYERS_TO_REMOVE
+    ),
+    TURNING_RAMP_UP_1_GROUPS["switches"]: make_switches_empty,
+    TURNING_RAMP_UP_1_GROUPS["left_trigger"]: partial(
+        add_trigger_removals_to_triggers, trigger_layers=ALTERNATIVE_TRIGGER_LAYERS_TO_REMOVE
+    ),
+    TURNING_RAMP_UP_1_GROUPS["right_trigger"]: partial(
+        add_trigger_removals_to_triggers, trigger_layers=ALTERNATIVE_TRIGGER_LAYERS_TO_REMOVE
+    ),
+}
+
 
 def process_file(file_path: str, dry_run: bool = False) -> Dict[str, int]:
     """Process a single JSON file."""
     print(f"\nProcessing: {file_path}")
     
-    # Detect layout type
-    layout_type = detect_layout_type(file_path)
+    # Determine layout type once from the path; the rest of the file only checks the flag
+    is_alt = "alternative" in file_path.lower()
+    layout_type = "alternative" if is_alt else "default"
     print(f"  Layout type: {layout_type}")
     
-    # Load the file
-    data = load_json_file(file_path)
+    # Load the file, only parsing it when one of the group IDs appears in the raw bytes
+    content = load_file_bytes(file_path)
+    if SYNCED_GROUP_IDS_BYTES_RE.search(content) is None:
+        print(f"  No changes needed (already synced or not applicable)")
+        return {"changes": 0}
+    data = parse_json_bytes(file_path, content)
     
     # Get groups array
     groups = data.get("controller_mappings", {}).get("group", [])
@@ -325,86 +347,35 @@ def process_file(file_path: str, dry_run: bool = False) -> Dict[str, int]:
         "switches_modified": 0
     }
     
-    # Determine which groups to modify based on layout type
-    if layout_type == "default":
-        # Default: L2/R2 are triggers (make empty), L1/R1 are modifiers (add trigger removal)
-        trigger_layers = DEFAULT_TRIGGER_LAYERS_TO_REMOVE
-        
-        # Turning Ramp Up 0
-        for group_id in [TURNING_RAMP_UP_0_GROUPS["left_trigger"], TURNING_RAMP_UP_0_GROUPS["right_trigger"]]:
-            group = find_group_by_id(groups, group_id)
-            if group:
-                make_trigger_empty(group, stats)
-        
-        group = find_group_by_id(groups, TURNING_RAMP_UP_0_GROUPS["switches"])
-        if group:
-            add_trigger_removals_to_switches(group, trigger_layers, stats)
-        
-        # Turning Ramp Up 1
-        for group_id in [TURNING_RAMP_UP_1_GROUPS["left_trigger"], TURNING_RAMP_UP_1_GROUPS["right_trigger"]]:
-            group = find_group_by_id(groups, group_id)
-            if group:
-                make_trigger_empty(group, stats)
-        
-        group = find_group_by_id(groups, TURNING_RAMP_UP_1_GROUPS["switches"])
-        if group:
-            add_trigger_removals_to_switches(group, trigger_layers, stats)
+    # Index the groups once, then run the layout's action for each of its groups
+    groups_by_id = index_groups_by_id(groups)
+    actions = ALTERNATIVE_GROUP_ACTIONS if is_alt else DEFAULT_GROUP_ACTIONS
     
-    else:  # alternative
-        # Alternative: L1/R1 are triggers (make switches empty), L2/R2 are modifiers (add trigger removal)
-        trigger_layers = ALTERNATIVE_TRIGGER_LAYERS_TO_REMOVE
-        
-        # Turning Ramp Up 0
-        group = find_group_by_id(groups, TURNING_RAMP_UP_0_GROUPS["switches"])
-        if group:
-            make_switches_empty(group, stats)
-        
-        for group_id in [TURNING_RAMP_UP_0_GROUPS["left_trigger"], TURNING_RAMP_UP_0_GROUPS["right_trigger"]]:
-            group = find_group_by_id(groups, group_id)
-            if group:
-                add_trigger_removals_to_triggers(group, trigger_layers, stats)
-        
-        # Turning Ramp Up 1
-        group = find_group_by_id(groups, TURNING_RAMP_UP_1_GROUPS["switches"])
+    for group_id, action in actions.items():
+        group = groups_by_id.get(group_id)
         if group:
-            make_switches_empty(group, stats)
-        
-        for group_id in [TURNING_RAMP_UP_1_GROUPS["left_trigger"], TURNING_RAMP_UP_1_GROUPS["right_trigger"]]:
-            group = find_group_by_id(groups, group_id)
-            if group:
-                add_trigger_removals_to_triggers(group, trigger_layers, stats)
+            action(group, stats=stats)
     
     # Report results
     total_changes = sum(stats.values())
     if total_changes > 0:
-        print(f"  Triggers emptied: {stats['triggers_emptied']}")
-        print(f"  Switches emptied: {stats['switches_emptied']}")
-        print(f"  Triggers modified (added removals): {stats['triggers_modified']}")
-        print(f"  Switches modified (added removals): {stats['switches_modified']}")
+        print(
+            f"  Triggers emptied: {stats['triggers_emptied']}\n"
+            f"  Switches emptied: {stats['switches_emptied']}\n"
+            f"  Triggers modified (added removals): {stats['triggers_modified']}\n"
+            f"  Switches modified (added removals): {stats['switches_modified']}"
+        )
         
         if dry_run:
             print(f"  [DRY RUN] Would save changes to: {file_path}")
         else:
-            save_json_file(file_path, data)
+            save_json_file(file_path, data, content)
     else:
         print(f"  No changes needed (already synced or not applicable)")
     
     return {"changes": total_changes, **stats}
 
 
-def find_neptune_json_files() -> List[str]:
-    """Find all JSON files in the neptune/ directory."""
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    neptune_dir = os.path.join(script_dir, "neptune")
-    
-    if not os.path.isdir(neptune_dir):
-        print(f"Error: neptune/ directory not found at {neptune_dir}")
-        sys.exit(1)
-    
-    json_files = glob.glob(os.path.join(neptune_dir, "*.json"))
-    return sorted(json_files)
-
-
 def main():
     parser = argparse.ArgumentParser(
         description="Sync Turning Ramp Up layers to match Chorded Ramp Up patterns"
@@ -446,8 +417,7 @@ def main():
     total_changes = 0
     files_modified = 0
     
-    for file_path in files_to_process:
-        result = process_file(file_path, args.dry_run)
+    for result in process_files(process_file, files_to_process, args.dry_run):
         if result["changes"] > 0:
             total_changes += result["changes"]
             files_modified += 1
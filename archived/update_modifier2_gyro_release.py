@@ -20,20 +20,22 @@ Usage:
     python3 update_modifier2_gyro_release.py --dry-run          # Preview changes without modifying
 """
 
-import json
 import sys
 import os
-import glob
+import re
 import argparse
-from collections import OrderedDict
-from typing import Dict, Any, List, Set
+from typing import Dict, List
+
+from _jsonio import (
+    load_file_bytes, parse_json_bytes, save_json_file, find_neptune_json_files, process_files
+)
 
 # The binding to replace
-EMPTY_BINDING = "controller_action empty_binding, , "
+EMPTY_BINDING = sys.intern("controller_action empty_binding, , ")
 
-# The replacement bindings
-GYRO_ADD = "controller_action add_layer {{Base::Gyro}} 1 1, , "
-GYRO_REMOVE = "controller_action remove_layer {{Base::Gyro}} 1 1, , "
+# The replacement bindings; interned so every replaced binding shares one string object
+GYRO_ADD = sys.intern("controller_action add_layer {{Base::Gyro}} 1 1, , ")
+GYRO_REMOVE = sys.intern("controller_action remove_layer {{Base::Gyro}} 1 1, , ")
 
 # Default layout - Modifier 2 layer switches groups (L1/R1 modifiers, bumper release)
 DEFAULT_NON_GYRO_GROUPS = ["599", "603"]  # L1!R1, R1!L1
@@ -43,34 +45,26 @@ DEFAULT_GYRO_GROUPS = ["12950", "12961"]  # (Gyro) L1!R1, (Gyro) R1!L1
 ALTERNATIVE_NON_GYRO_GROUPS = ["597", "598", "601", "602"]  # L2!R2, R2!L2
 ALTERNATIVE_GYRO_GROUPS = ["12948", "12949", "12959", "12960"]  # (Gyro) L2!R2, (Gyro) R2!L2
 
+# Raw-bytes pre-scan: a file can only need changes if it still has an empty
+# binding and one of the layout's quoted Modifier 2 group IDs (json never escapes digits)
+EMPTY_BINDING_BYTES = EMPTY_BINDING.encode()
+DEFAULT_GROUP_IDS_BYTES_RE = re.compile(
+    b"|".join(b'"' + group_id.encode() + b'"' for group_id in DEFAULT_NON_GYRO_GROUPS + DEFAULT_GYRO_GROUPS)
+)
+ALTERNATIVE_GROUP_IDS_BYTES_RE = re.compile(
+    b"|".join(b'"' + group_id.encode() + b'"' for group_id in ALTERNATIVE_NON_GYRO_GROUPS + ALTERNATIVE_GYRO_GROUPS)
+)
 
-def load_json_file(file_path: str) -> Dict[str, Any]:
-    """Load and parse a JSON file, preserving key order."""
-    try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            return json.load(f, object_pairs_hook=OrderedDict)
-    except FileNotFoundError:
-        print(f"Error: File '{file_path}' not found.")
-        sys.exit(1)
-    except json.JSONDecodeError as e:
-        print(f"Error: Invalid JSON in file '{file_path}': {e}")
-        sys.exit(1)
-
-
-def save_json_file(file_path: str, data: Dict[str, Any]) -> None:
-    """Save data to a JSON file with proper formatting."""
-    try:
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent='\t', ensure_ascii=False)
-        print(f"  Saved: {file_path}")
-    except Exception as e:
-        print(f"Error saving file: {e}")
-        sys.exit(1)
-
-
-def is_alternative_layout(file_path: str) -> bool:
-    """Check if the file is an alternative layout."""
-    return "alternative" in os.path.basename(file_path).lower()
+# Per-layout dispatch from group ID to (replacement binding, report description):
+# non-gyro groups add the Gyro layer on release, gyro groups remove it
+DEFAULT_GROUP_RELEASES = {
+    **{group_id: (GYRO_ADD, "add_layer Gyro") for group_id in DEFAULT_NON_GYRO_GROUPS},
+    **{group_id: (GYRO_REMOVE, "remove_layer Gyro") for group_id in DEFAULT_GYRO_GROUPS},
+}
+ALTERNATIVE_GROUP_RELEASES = {
+    **{group_id: (GYRO_ADD, "add_layer Gyro") for group_id in ALTERNATIVE_NON_GYRO_GROUPS},
+    **{group_id: (GYRO_REMOVE, "remove_layer Gyro") for group_id in ALTERNATIVE_GYRO_GROUPS},
+}
 
 
 def replace_empty_binding_in_list(binding_list: List[str], replacement: str) -> bool:
@@ -85,42 +79,27 @@ def replace_empty_binding_in_list(binding_list: List[str], replacement: str) ->
 def process_bumper_release(group: Dict, replacement: str, stats: Dict) -> bool:
     """Process bumper release bindings (for default layout)."""
     modified = False
-    inputs = group.get("inputs", {})
+    inputs = group.get("inputs")
+    if not inputs:
+        return False
     
+    # Missing or empty levels bail out early instead of descending through
+    # throwaway empty dicts
     for bumper_name in ["left_bumper", "right_bumper"]:
-        bumper = inputs.get(bumper_name, {})
-        activators = bumper.get("activators", {})
-        release = activators.get("release", {})
+        bumper = inputs.get(bumper_name)
+        if not bumper:
+            continue
+        activators = bumper.get("activators")
+        if not activators:
+            continue
+        release = activators.get("release")
+        if not isinstance(release, dict):
+            continue
+        bindings_obj = release.get("bindings")
+        if not bindings_obj:
+            continue
         
-        if isinstance(release, dict):
-            bindings_obj = release.get("bindings", {})
-            binding = bindings_obj.get("binding")
-            
-            if isinstance(binding, list):
-                if replace_empty_binding_in_list(binding, replacement):
-                    stats["bindings_modified"] += 1
-                    modified = True
-            elif isinstance(binding, str) and EMPTY_BINDING in binding:
-                bindings_obj["binding"] = replacement
-                stats["bindings_modified"] += 1
-                modified = True
-    
-    return modified
-
-
-def process_trigger_release(group: Dict, replacement: str, stats: Dict) -> bool:
-    """Process trigger edge release bindings (for alternative layout)."""
-    modified = False
-    inputs = group.get("inputs", {})
-    
-    edge = inputs.get("edge", {})
-    activators = edge.get("activators", {})
-    release = activators.get("release", {})
-    
-    if isinstance(release, dict):
-        bindings_obj = release.get("bindings", {})
         binding = bindings_obj.get("binding")
-        
         if isinstance(binding, list):
             if replace_empty_binding_in_list(binding, replacement):
                 stats["bindings_modified"] += 1
@@ -133,25 +112,63 @@ def process_trigger_release(group: Dict, replacement: str, stats: Dict) -> bool:
     return modified
 
 
+def process_trigger_release(group: Dict, replacement: str, stats: Dict) -> bool:
+    """Process trigger edge release bindings (for alternative layout)."""
+    inputs = group.get("inputs")
+    if not inputs:
+        return False
+    edge = inputs.get("edge")
+    if not edge:
+        return False
+    activators = edge.get("activators")
+    if not activators:
+        return False
+    release = activators.get("release")
+    if not isinstance(release, dict):
+        return False
+    bindings_obj = release.get("bindings")
+    if not bindings_obj:
+        return False
+    
+    binding = bindings_obj.get("binding")
+    if isinstance(binding, list):
+        if replace_empty_binding_in_list(binding, replacement):
+            stats["bindings_modified"] += 1
+            return True
+    elif isinstance(binding, str) and EMPTY_BINDING in binding:
+        bindings_obj["binding"] = replacement
+        stats["bindings_modified"] += 1
+        return True
+    
+    return False
+
+
 def process_file(file_path: str, dry_run: bool = False) -> Dict[str, int]:
     """Process a single JSON file."""
     print(f"\nProcessing: {file_path}")
     
-    # Determine layout type
-    is_alt = is_alternative_layout(file_path)
+    # Determine layout type once from the file name
+    is_alt = "alternative" in os.path.basename(file_path).lower()
     layout_type = "alternative" if is_alt else "default"
     print(f"  Layout type: {layout_type}")
     
-    # Select the appropriate group IDs
+    # Select the group ID table and the release walk for this layout:
+    # alternative uses trigger edge release, default uses bumper release
     if is_alt:
-        non_gyro_groups = set(ALTERNATIVE_NON_GYRO_GROUPS)
-        gyro_groups = set(ALTERNATIVE_GYRO_GROUPS)
+        group_ids_bytes_re = ALTERNATIVE_GROUP_IDS_BYTES_RE
+        group_releases = ALTERNATIVE_GROUP_RELEASES
+        process_release = process_trigger_release
     else:
-        non_gyro_groups = set(DEFAULT_NON_GYRO_GROUPS)
-        gyro_groups = set(DEFAULT_GYRO_GROUPS)
+        group_ids_bytes_re = DEFAULT_GROUP_IDS_BYTES_RE
+        group_releases = DEFAULT_GROUP_RELEASES
+        process_release = process_bumper_release
     
-    # Load the file
-    data = load_json_file(file_path)
+    # Load the file, only parsing it when the raw bytes could need changes
+    content = load_file_bytes(file_path)
+    if content.find(EMPTY_BINDING_BYTES) == -1 or group_ids_bytes_re.search(content) is None:
+        print(f"  No changes needed")
+        return {"bindings_modified": 0}
+    data = parse_json_bytes(file_path, content)
     
     # Get groups
     cm = data.get("controller_mappings", data)
@@ -162,64 +179,35 @@ def process_file(file_path: str, dry_run: bool = False) -> Dict[str, int]:
         "bindings_modified": 0
     }
     
-    modified = False
-    
+    # One dict lookup per group picks its replacement, if it is a Modifier 2 group;
+    # the per-group report lines are collected and printed in one call
+    updated_groups = []
     for group in groups:
         group_id = group.get("id")
+        release = group_releases.get(group_id)
+        if release is None:
+            continue
         
-        # Process non-gyro groups (add Gyro layer)
-        if group_id in non_gyro_groups:
-            if is_alt:
-                # Alternative: trigger edge release
-                if process_trigger_release(group, GYRO_ADD, stats):
-                    print(f"  Group {group_id}: Updated release to add_layer Gyro")
-                    modified = True
-            else:
-                # Default: bumper release
-                if process_bumper_release(group, GYRO_ADD, stats):
-                    print(f"  Group {group_id}: Updated release to add_layer Gyro")
-                    modified = True
-        
-        # Process gyro groups (remove Gyro layer)
-        if group_id in gyro_groups:
-            if is_alt:
-                # Alternative: trigger edge release
-                if process_trigger_release(group, GYRO_REMOVE, stats):
-                    print(f"  Group {group_id}: Updated release to remove_layer Gyro")
-                    modified = True
-            else:
-                # Default: bumper release
-                if process_bumper_release(group, GYRO_REMOVE, stats):
-                    print(f"  Group {group_id}: Updated release to remove_layer Gyro")
-                    modified = True
+        replacement, description = release
+        if process_release(group, replacement, stats):
+            updated_groups.append(f"  Group {group_id}: Updated release to {description}")
     
     # Report results
+    if updated_groups:
+        print("\n".join(updated_groups))
     if stats["bindings_modified"] > 0:
         print(f"  Total bindings modified: {stats['bindings_modified']}")
         
         if dry_run:
             print(f"  [DRY RUN] Would save changes to: {file_path}")
         else:
-            save_json_file(file_path, data)
+            save_json_file(file_path, data, content)
     else:
         print(f"  No changes needed")
     
     return stats
 
 
-def find_neptune_json_files() -> List[str]:
-    """Find all JSON files in the neptune/ directory."""
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    neptune_dir = os.path.join(script_dir, "neptune")
-    
-    if not os.path.isdir(neptune_dir):
-        print(f"Error: neptune/ directory not found at {neptune_dir}")
-        sys.exit(1)
-    
-    json_files = glob.glob(os.path.join(neptune_dir, "*.json"))
-    return sorted(json_files)
-
-
 def main():
     parser = argparse.ArgumentParser(
         description="Update Modifier 2 layers with Gyro release bindings"
@@ -264,8 +252,7 @@ def main():
         "total_bindings_modified": 0
     }
     
-    for file_path in files_to_process:
-        stats = process_file(file_path, args.dry_run)
+    for stats in process_files(process_file, files_to_process, args.dry_run):
         total_stats["files_processed"] += 1
         if stats["bindings_modified"] > 0:
             total_stats["files_modified"] += 1
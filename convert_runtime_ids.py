@@ -32,37 +32,70 @@ import sys
 import os
 import re
 import argparse
-from collections import OrderedDict
 from typing import Dict, Any, List, Tuple
 
+# Commands that use runtime IDs
+RUNTIME_ID_COMMANDS = ('CHANGE_PRESET', 'add_layer', 'remove_layer', 'hold_layer')
 
-def load_json_file(file_path: str) -> Dict[str, Any]:
-    """Load and parse a JSON file, preserving key order."""
+# The file is converted as raw UTF-8 bytes, so the patterns below are bytes
+# patterns too; their \d only ever matches ASCII digits
+
+# Every runtime ID command starts with this; text without it has nothing to convert
+CONTROLLER_ACTION_PREFIX = b"controller_action "
+
+# Any runtime ID command, capturing (prefix, runtime ID, trailing params),
+# e.g. "controller_action add_layer 5 0 0"
+RUNTIME_ID_COMMAND_RE = re.compile(
+    rf'(controller_action (?:{"|".join(RUNTIME_ID_COMMANDS)}) )(\d+)( \d+ \d+)'.encode()
+)
+
+# Per command, {{Title}} or {{Parent::Title}} in place of the runtime ID,
+# capturing (prefix, title, trailing params); compiled once at import and
+# keyed by the literal text every match starts with
+TITLE_COMMAND_RES = {
+    f"controller_action {cmd} {{{{".encode(): re.compile(
+        rf'(controller_action {cmd} )\{{\{{([^}}]+)\}}\}}( \d+ \d+)'.encode()
+    )
+    for cmd in RUNTIME_ID_COMMANDS
+}
+
+
+def load_file_bytes(file_path: str) -> bytes:
+    """Load the raw bytes of a layout file, read once for both parsing and conversion."""
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            return json.load(f, object_pairs_hook=OrderedDict)
+        with open(file_path, 'rb') as f:
+            return f.read()
     except FileNotFoundError:
         print(f"Error: File '{file_path}' not found.")
         sys.exit(1)
+
+
+def parse_json_bytes(file_path: str, content: bytes) -> Dict[str, Any]:
+    """Parse JSON bytes previously loaded from file_path; plain dicts keep the file's key order."""
+    try:
+        return json.loads(content)
     except json.JSONDecodeError as e:
         print(f"Error: Invalid JSON in file '{file_path}': {e}")
         sys.exit(1)
 
 
-def load_text_file(file_path: str) -> str:
-    """Load a text file."""
+def save_file(file_path: str, content: bytes) -> None:
+    """
+    Save content to a file.
+    
+    The content goes to a sibling temporary file that is then renamed over
+    the target, so an interrupted save never leaves a truncated layout behind.
+    """
+    tmp_path = file_path + ".tmp"
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            return f.read()
-    except FileNotFoundError:
-        print(f"Error: File '{file_path}' not found.")
+        with open(tmp_path, 'wb') as f:
+            f.write(content)
+        os.replace(tmp_path, file_path)
+    except OSError as e:
+        print(f"Error saving file: {e}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
         sys.exit(1)
-
-
-def save_file(file_path: str, content: str) -> None:
-    """Save content to a file."""
-    with open(file_path, 'w', encoding='utf-8') as f:
-        f.write(content)
     print(f"Saved to: {file_path}")
 
 
@@ -76,17 +109,19 @@ def generate_lookup(layout_data: Dict[str, Any]) -> Dict[str, Any]:
     - detailed: list of all entries with metadata
     """
     cm = layout_data.get("controller_mappings", {})
-    actions = cm.get("actions", OrderedDict())
-    action_layers = cm.get("action_layers", OrderedDict())
+    actions = cm.get("actions", {})
+    action_layers = cm.get("action_layers", {})
     
     detailed = []
     id_to_title = {}
     title_to_id = {}
+    action_set_titles = {}  # Parent title map, filled in the same pass
     runtime_id = 1
     
     # Action sets first
     for preset_id, data in actions.items():
         title = data.get("title", "Unknown")
+        action_set_titles[preset_id] = title
         detailed.append({
             "runtime_id": runtime_id,
             "preset_id": preset_id,
@@ -98,9 +133,6 @@ def generate_lookup(layout_data: Dict[str, Any]) -> Dict[str, Any]:
         title_to_id[title] = runtime_id
         runtime_id += 1
     
-    # Build parent title map
-    action_set_titles = {pid: data.get("title", "Unknown") for pid, data in actions.items()}
-    
     # Action layers next
     for preset_id, data in action_layers.items():
         title = data.get("title", "Unknown")
@@ -129,67 +161,66 @@ def generate_lookup(layout_data: Dict[str, Any]) -> Dict[str, Any]:
     }
 
 
-def ids_to_titles(content: str, lookup: Dict[str, Any]) -> Tuple[str, int]:
-    """Replace runtime IDs with human-readable titles using two-pass replacement."""
-    id_to_title = lookup["id_to_title"]
-    
-    result = content
-    total_replacements = 0
-    
-    # Commands that use runtime IDs
-    commands = ['CHANGE_PRESET', 'add_layer', 'remove_layer', 'hold_layer']
+def ids_to_titles(content: bytes, lookup: Dict[str, Any]) -> Tuple[bytes, int]:
+    """
+    Replace runtime IDs with human-readable titles in a single pass.
     
-    # PASS 1: Replace IDs with placeholders (sort descending to avoid partial matches)
-    sorted_ids = sorted(id_to_title.keys(), key=lambda x: int(x), reverse=True)
+    One compiled pattern captures the whole ID of every runtime ID command, so
+    each command is rewritten at most once and a shorter ID can never match
+    inside a longer one.
+    """
+    if CONTROLLER_ACTION_PREFIX not in content:
+        return content, 0
     
-    placeholders = {}
-    for rid in sorted_ids:
-        title = id_to_title[rid]
-        placeholder = f"__TITLE_PLACEHOLDER_{rid}__"
-        placeholders[placeholder] = f"{{{{{title}}}}}"  # {{Title}} format
-        
-        for cmd in commands:
-            pattern = rf'(controller_action {cmd} ){rid}( \d+ \d+)'
-            count = len(re.findall(pattern, result))
-            if count > 0:
-                result = re.sub(pattern, rf'\g<1>{placeholder}\g<2>', result)
-                total_replacements += count
+    # Encoded {{Title}} references, looked up by the matched ID bytes
+    title_refs = {
+        rid.encode(): f"{{{{{title}}}}}".encode('utf-8')
+        for rid, title in lookup["id_to_title"].items()
+    }
+    total_replacements = 0
     
-    # PASS 2: Replace placeholders with actual titles
-    for placeholder, title in placeholders.items():
-        result = result.replace(placeholder, title)
+    def replace_func(match):
+        nonlocal total_replacements
+        title_ref = title_refs.get(match.group(2))
+        if title_ref is None:
+            return match.group(0)
+        total_replacements += 1
+        return match.group(1) + title_ref + match.group(3)
     
+    result = RUNTIME_ID_COMMAND_RE.sub(replace_func, content)
     return result, total_replacements
 
 
-def titles_to_ids(content: str, lookup: Dict[str, Any]) -> Tuple[str, int]:
+def titles_to_ids(content: bytes, lookup: Dict[str, Any]) -> Tuple[bytes, int]:
     """Replace human-readable titles back to runtime IDs."""
+    if b"{{" not in content or CONTROLLER_ACTION_PREFIX not in content:
+        return content, 0
+    
     title_to_id = lookup["title_to_id"]
     
     result = content
     total_replacements = 0
     
-    # Commands that use runtime IDs
-    commands = ['CHANGE_PRESET', 'add_layer', 'remove_layer', 'hold_layer']
-    
-    for cmd in commands:
-        # Pattern to find {{Title}} or {{Parent::Title}} in commands
-        pattern = rf'(controller_action {cmd} )\{{\{{([^}}]+)\}}\}}( \d+ \d+)'
-        
-        def replace_func(match):
-            nonlocal total_replacements
-            prefix = match.group(1)
-            title = match.group(2)
-            suffix = match.group(3)
-            
-            if title in title_to_id:
-                total_replacements += 1
-                return f"{prefix}{title_to_id[title]}{suffix}"
-            else:
-                print(f"  Warning: Could not find runtime ID for '{title}'")
-                return match.group(0)
+    def replace_func(match):
+        nonlocal total_replacements
+        prefix = match.group(1)
+        # "}" is ASCII, so the captured title is always whole UTF-8
+        title = match.group(2).decode('utf-8')
+        suffix = match.group(3)
         
-        result = re.sub(pattern, replace_func, result)
+        if title in title_to_id:
+            total_replacements += 1
+            return prefix + str(title_to_id[title]).encode() + suffix
+        else:
+            print(f"  Warning: Could not find runtime ID for '{title}'")
+            return match.group(0)
+    
+    # One command at a time, so warnings keep their per-command order
+    for literal, pattern in TITLE_COMMAND_RES.items():
+        # A plain substring check is enough to skip commands that never occur
+        if literal not in result:
+            continue
+        result = pattern.sub(replace_func, result)
     
     return result, total_replacements
 
@@ -211,18 +242,20 @@ def main():
     
     args = parser.parse_args()
     
-    # Load the JSON to generate lookup
+    # Load the file once; the JSON is parsed to generate the lookup, and the
+    # raw bytes are converted directly (preserves formatting)
     print(f"Loading: {args.json_file}")
-    layout_data = load_json_file(args.json_file)
+    content = load_file_bytes(args.json_file)
+    layout_data = parse_json_bytes(args.json_file, content)
     
     # Generate lookup from the file itself
     lookup = generate_lookup(layout_data)
-    action_sets = sum(1 for i in lookup["detailed"] if i["type"] == "action_set")
-    layers = sum(1 for i in lookup["detailed"] if i["type"] == "action_layer")
-    print(f"Found {action_sets} action sets, {layers} layers")
     
-    # Load file as text for replacement (preserves formatting)
-    content = load_text_file(args.json_file)
+    # The lookup has one entry per action set and layer, so count them directly
+    cm = layout_data.get("controller_mappings", {})
+    action_sets = len(cm.get("actions", {}))
+    layers = len(cm.get("action_layers", {}))
+    print(f"Found {action_sets} action sets, {layers} layers")
     
     # Perform conversion
     if args.mode == "to-titles":
@@ -20,28 +20,57 @@ Runtime ID System:
 - Action sets are numbered first (starting at 1)
 - Action layers are numbered after all action sets
 - Deleting an action set shifts ALL subsequent IDs down
-- This script uses a two-pass replacement to safely update all IDs
+- This script rewrites every ID in a single pass, so no ID is ever updated twice
 
 Usage:
-    python delete_action_set_complete.py <json_file> <preset_id>
+    python delete_action_set_complete.py <json_file> <preset_id> [--verbose]
 
 Example:
     python delete_action_set_complete.py "neptune/universal-layout-default__hold-gyro__latest.json" "Preset_1000014"
 """
 
+import argparse
 import json
 import sys
 import os
 import re
+import shutil
 from typing import Dict, List, Set, Any, Tuple
-from collections import OrderedDict
+from itertools import chain
+
+try:
+    import orjson  # Optional: faster parsing; output is still written by json
+except ImportError:
+    orjson = None
+
+# Encoder for saved layouts, built once instead of on every json.dumps call
+JSON_ENCODER = json.JSONEncoder(indent='\t', ensure_ascii=False)
+
+# Commands that use runtime IDs
+RUNTIME_ID_COMMANDS = ('CHANGE_PRESET', 'add_layer', 'remove_layer', 'hold_layer')
+
+# Every runtime ID command starts with this, so strings without it are skipped
+CONTROLLER_ACTION_PREFIX = "controller_action "
+
+# Any runtime ID command, capturing (prefix, command, runtime ID, trailing params),
+# e.g. "controller_action add_layer 5 0 0"
+RUNTIME_ID_COMMAND_RE = re.compile(
+    rf'(controller_action ({"|".join(RUNTIME_ID_COMMANDS)}) )(\d+)( \d+ \d+)',
+    re.ASCII
+)
 
 
 def load_json_file(file_path: str) -> Dict[str, Any]:
-    """Load and parse a JSON file, preserving key order."""
+    """
+    Load and parse a JSON file; plain dicts keep the file's key order.
+    
+    Parses with orjson when it is installed (its JSONDecodeError subclasses
+    json's), otherwise with the standard library.
+    """
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            return json.load(f, object_pairs_hook=OrderedDict)
+        with open(file_path, 'rb') as f:
+            content = f.read()
+        return orjson.loads(content) if orjson is not None else json.loads(content)
     except FileNotFoundError:
         print(f"Error: File '{file_path}' not found.")
         sys.exit(1)
@@ -51,13 +80,27 @@ def load_json_file(file_path: str) -> Dict[str, Any]:
 
 
 def save_json_file(file_path: str, data: Dict[str, Any]) -> None:
-    """Save data to a JSON file with proper formatting."""
+    """
+    Save data to a JSON file with proper formatting.
+    
+    The JSON goes to a sibling temporary file that is then renamed over the
+    original, so an interrupted save never leaves a truncated layout behind.
+    """
+    tmp_path = file_path + ".tmp"
     try:
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent='\t', ensure_ascii=False)
+        # Serialize up front so the file is written in one call rather than
+        # the many small chunks json.dump streams out
+        payload = JSON_ENCODER.encode(data).encode('utf-8')
+        # Written as bytes in binary mode: the payload is encoded once, and a
+        # single write this large goes straight past the file buffer
+        with open(tmp_path, 'wb') as f:
+            f.write(payload)
+        os.replace(tmp_path, file_path)
         print(f"Successfully saved to '{file_path}'")
     except Exception as e:
         print(f"Error saving file: {e}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
         sys.exit(1)
 
 
@@ -72,44 +115,49 @@ def calculate_runtime_ids(actions: Dict, action_layers: Dict) -> Dict[str, int]:
     Returns:
         Dict mapping Preset_ID (e.g., "Preset_1000001") to runtime ID (e.g., 1)
     """
-    runtime_ids = {}
-    position = 1
-    
-    # Action sets first
-    for action_key in actions.keys():
-        runtime_ids[action_key] = position
-        position += 1
-    
-    # Action layers next
-    for layer_key in action_layers.keys():
-        runtime_ids[layer_key] = position
-        position += 1
-    
-    return runtime_ids
+    # Action sets first, then action layers
+    return {
+        preset_id: position
+        for position, preset_id in enumerate(chain(actions.keys(), action_layers.keys()), start=1)
+    }
 
 
-def find_layers_to_delete(action_layers: Dict, target_action_set: str) -> List[str]:
-    """Find all action layers that belong to the target action set."""
-    layers_to_delete = []
+def partition_layers(action_layers: Dict, target_action_set: str) -> Tuple[Dict, Dict]:
+    """
+    Split the action layers into those that belong to the target action set and the rest, in one pass.
+    
+    Building the kept layers as a new dict avoids a pop, and the resizing that
+    comes with it, for every deleted layer.
+    
+    Returns:
+        Tuple of (layers to delete, layers to keep), each keyed by layer ID in
+        their original order
+    """
+    layers_to_delete = {}
+    layers_kept = {}
     for layer_id, layer_data in action_layers.items():
         if layer_data.get("parent_set_name") == target_action_set:
-            layers_to_delete.append(layer_id)
-    return layers_to_delete
+            layers_to_delete[layer_id] = layer_data
+        else:
+            layers_kept[layer_id] = layer_data
+    return layers_to_delete, layers_kept
 
 
-def find_groups_to_delete(presets: List[Dict], preset_names_to_delete: Set[str]) -> Set[str]:
-    """
-    Find all group IDs that need to be deleted based on the presets being deleted.
-    These are the groups referenced in the group_source_bindings of deleted presets.
+def partition_presets(presets: List[Dict], preset_names_to_delete: Set[str]) -> Tuple[List[Dict], List[Dict]]:
     """
-    groups_to_delete = set()
+    Split the preset entries into those being deleted and those being kept, in one pass.
     
+    Returns:
+        Tuple of (deleted presets, kept presets), each in their original order
+    """
+    presets_deleted = []
+    presets_kept = []
     for preset in presets:
         if preset.get("name") in preset_names_to_delete:
-            group_source_bindings = preset.get("group_source_bindings", {})
-            groups_to_delete.update(group_source_bindings.keys())
-    
-    return groups_to_delete
+            presets_deleted.append(preset)
+        else:
+            presets_kept.append(preset)
+    return presets_deleted, presets_kept
 
 
 def build_runtime_id_mapping(
@@ -120,80 +168,97 @@ def build_runtime_id_mapping(
     """
     Build a mapping of old runtime IDs to new runtime IDs for items that weren't deleted.
     
+    new_runtime_ids is calculated after the deletion, so it only holds the
+    items that still exist, in their original order.
+    
     Returns:
         Dict mapping old runtime ID to new runtime ID
     """
-    id_mapping = {}
-    
-    # For each item that still exists, map its old ID to its new ID
-    for preset_id, old_id in old_runtime_ids.items():
-        if preset_id not in deleted_preset_ids:
-            if preset_id in new_runtime_ids:
-                new_id = new_runtime_ids[preset_id]
-                if old_id != new_id:
-                    id_mapping[old_id] = new_id
-    
-    return id_mapping
+    return {
+        old_runtime_ids[preset_id]: new_id
+        for preset_id, new_id in new_runtime_ids.items()
+        if preset_id not in deleted_preset_ids and old_runtime_ids[preset_id] != new_id
+    }
 
 
-def update_controller_action_ids_two_pass(json_str: str, id_mapping: Dict[int, int]) -> str:
+def update_controller_action_ids(layout_data: Dict[str, Any], id_mapping: Dict[int, int],
+                                 verbose: bool = False) -> int:
     """
-    Update controller_action command IDs using a two-pass approach.
+    Update controller_action command IDs in place, in a single pass.
     
-    Pass 1: Replace "controller_action CMD OLD_ID" with "controller_action CMD __TEMP_OLD_NEW__"
-    Pass 2: Replace "__TEMP_OLD_NEW__" with just "NEW_ID"
+    Walks the layout with an explicit stack and rewrites only the string
+    values that hold a controller_action command, rather than serializing the
+    whole layout to text and parsing it back. One compiled pattern captures
+    the whole ID of every runtime ID command and a callback swaps in its new
+    ID. Each command is matched exactly once, so a rewritten ID is never
+    picked up again by a later mapping and no placeholders are needed.
     
-    This ensures uniqueness and prevents cascading replacements.
+    Only the total is reported unless verbose is set, in which case the
+    replacements per command and old ID follow in one write.
+    
+    Returns:
+        Number of runtime IDs updated
     
     Commands affected:
     - controller_action CHANGE_PRESET X Y Z
     - controller_action add_layer X Y Z  
     - controller_action remove_layer X Y Z
+    - controller_action hold_layer X Y Z
     """
     if not id_mapping:
-        return json_str
+        return 0
     
     print(f"\n  Updating controller_action runtime IDs...")
     print(f"  ID mapping (old -> new): {id_mapping}")
     
-    result = json_str
-    
-    # Patterns for controller_action commands
-    # Format: "controller_action CMD ID PARAM1 PARAM2, ..."
-    commands = ['CHANGE_PRESET', 'add_layer', 'remove_layer', 'hold_layer']
-    
-    # PASS 1: Replace old IDs with unique placeholders
-    # Sort by old ID descending to avoid partial replacements (e.g., 10 before 1)
-    sorted_mappings = sorted(id_mapping.items(), key=lambda x: x[0], reverse=True)
-    
-    for old_id, new_id in sorted_mappings:
-        for cmd in commands:
-            # Match the command with the old ID
-            # Pattern: controller_action CMD OLD_ID followed by space and more params
-            pattern = rf'(controller_action {cmd} ){old_id}( \d+ \d+)'
-            placeholder = f'__RUNTIME_ID_{old_id}_TO_{new_id}__'
-            replacement = rf'\g<1>{placeholder}\g<2>'
-            
-            count_before = len(re.findall(pattern, result))
-            if count_before > 0:
-                result = re.sub(pattern, replacement, result)
-                print(f"    Pass 1: {cmd} {old_id} -> placeholder ({count_before} occurrences)")
-    
-    # PASS 2: Replace placeholders with actual new IDs
-    for old_id, new_id in sorted_mappings:
-        placeholder = f'__RUNTIME_ID_{old_id}_TO_{new_id}__'
-        if placeholder in result:
-            count = result.count(placeholder)
-            result = result.replace(placeholder, str(new_id))
-            print(f"    Pass 2: placeholder -> {new_id} ({count} occurrences)")
-    
-    return result
+    # Matched IDs are strings, so the new ID text is formatted once per mapping
+    # and looked up by the old ID text; counts stay keyed by the matched text
+    # until they are reported
+    new_ids = {str(old_id): str(new_id) for old_id, new_id in id_mapping.items()}
+    counts = {}  # (old_id text, cmd) -> occurrences replaced
+    
+    def replace_func(match):
+        old_id = match.group(3)
+        new_id = new_ids.get(old_id)
+        if new_id is None:
+            return match.group(0)
+        key = (old_id, match.group(2))
+        counts[key] = counts.get(key, 0) + 1
+        return f"{match.group(1)}{new_id}{match.group(4)}"
+    
+    stack = [layout_data]
+    while stack:
+        container = stack.pop()
+        entries = container.items() if isinstance(container, dict) else enumerate(container)
+        for key, value in entries:
+            if isinstance(value, str):
+                if CONTROLLER_ACTION_PREFIX in value:
+                    # Replacing the value of an existing key keeps iteration valid
+                    container[key] = RUNTIME_ID_COMMAND_RE.sub(replace_func, value)
+            elif isinstance(value, (dict, list)):
+                stack.append(value)
+    
+    total_updated = sum(counts.values())
+    print(f"    Updated {total_updated} controller_action runtime IDs")
+    
+    if verbose and counts:
+        # Highest IDs first, each command in RUNTIME_ID_COMMANDS order
+        command_order = {cmd: index for index, cmd in enumerate(RUNTIME_ID_COMMANDS)}
+        print("\n".join(
+            f"    {cmd} {old_id} -> {new_ids[old_id]} ({counts[(old_id, cmd)]} occurrences)"
+            for old_id, cmd in sorted(counts, key=lambda key: (-int(key[0]), command_order[key[1]]))
+        ))
+    
+    return total_updated
 
 
 def delete_action_set_complete(layout_data: Dict[str, Any], target_preset_id: str) -> Tuple[Dict[str, Any], Dict]:
     """
     Delete an action set and ALL its associations.
     
+    layout_data is modified in place, not copied; the same object is
+    returned. main backs up the file on disk before calling this.
+    
     Args:
         layout_data: The parsed JSON layout data
         target_preset_id: The ID of the action set to delete (e.g., "Preset_1000014")
@@ -215,8 +280,8 @@ def delete_action_set_complete(layout_data: Dict[str, Any], target_preset_id: st
     }
     
     cm = layout_data.get("controller_mappings", {})
-    actions = cm.get("actions", OrderedDict())
-    action_layers = cm.get("action_layers", OrderedDict())
+    actions = cm.get("actions", {})
+    action_layers = cm.get("action_layers", {})
     presets = cm.get("preset", [])
     groups = cm.get("group", [])
     
@@ -236,19 +301,27 @@ def delete_action_set_complete(layout_data: Dict[str, Any], target_preset_id: st
     
     # STEP 2: Find all layers that belong to this action set
     print(f"\n[Step 2] Finding action layers with parent_set_name = '{target_preset_id}'...")
-    layers_to_delete = find_layers_to_delete(action_layers, target_preset_id)
-    print(f"  Found {len(layers_to_delete)} layers to delete:")
-    for layer_id in layers_to_delete:
-        layer_title = action_layers[layer_id].get("title", "Unknown")
-        layer_runtime_id = old_runtime_ids[layer_id]
-        print(f"    - {layer_id} ('{layer_title}') - Runtime ID: {layer_runtime_id}")
+    layers_to_delete, layers_kept = partition_layers(action_layers, target_preset_id)
+    # Each step's per-entry lines are printed in one call
+    print("\n".join([f"  Found {len(layers_to_delete)} layers to delete:"] + [
+        f"    - {layer_id} ('{layer_data.get('title', 'Unknown')}') - Runtime ID: {old_runtime_ids[layer_id]}"
+        for layer_id, layer_data in layers_to_delete.items()
+    ]))
     
     # Collect all preset IDs to delete (action set + its layers)
     preset_ids_to_delete = {target_preset_id} | set(layers_to_delete)
     
     # STEP 3: Find groups to delete
+    # The presets are split once here; steps 7 and 9 reuse both halves
     print(f"\n[Step 3] Finding groups referenced by deleted presets...")
-    groups_to_delete = find_groups_to_delete(presets, preset_ids_to_delete)
+    presets_deleted, presets_kept = partition_presets(presets, preset_ids_to_delete)
+    # These are the groups referenced in the group_source_bindings of deleted
+    # presets; frozen, since steps 8 and 9 only test membership against it
+    groups_to_delete = frozenset(
+        group_id
+        for preset in presets_deleted
+        for group_id in preset.get("group_source_bindings", {})
+    )
     print(f"  Found {len(groups_to_delete)} groups to delete: {sorted(groups_to_delete, key=int)}")
     
     # STEP 4: Delete from actions
@@ -259,10 +332,15 @@ def delete_action_set_complete(layout_data: Dict[str, Any], target_preset_id: st
     
     # STEP 5: Delete action layers
     print(f"\n[Step 5] Deleting action layers from 'action_layers' block...")
-    for layer_id in layers_to_delete:
-        deleted_layer = action_layers.pop(layer_id)
+    report = []
+    for layer_id, deleted_layer in layers_to_delete.items():
         stats["layers_deleted"].append({"id": layer_id, "title": deleted_layer.get("title")})
-        print(f"  Deleted: {layer_id} ('{deleted_layer.get('title')}')")
+        report.append(f"  Deleted: {layer_id} ('{deleted_layer.get('title')}')")
+    if report:
+        print("\n".join(report))
+        # Only replaced when something was deleted, so a layout without an
+        # action_layers block doesn't gain an empty one
+        cm["action_layers"] = action_layers = layers_kept
     
     # STEP 6: Calculate AFTER runtime IDs
     print(f"\n[Step 6] Calculating runtime IDs AFTER deletion...")
@@ -274,43 +352,49 @@ def delete_action_set_complete(layout_data: Dict[str, Any], target_preset_id: st
     
     # STEP 7: Delete preset entries
     print(f"\n[Step 7] Deleting preset entries from 'preset' array...")
-    presets_kept = []
-    for preset in presets:
+    report = []
+    for preset in presets_deleted:
         preset_name = preset.get("name")
-        if preset_name in preset_ids_to_delete:
-            stats["presets_deleted"].append(preset_name)
-            print(f"  Deleted preset: {preset_name} (id: {preset.get('id')})")
-        else:
-            presets_kept.append(preset)
+        stats["presets_deleted"].append(preset_name)
+        report.append(f"  Deleted preset: {preset_name} (id: {preset.get('id')})")
+    if report:
+        print("\n".join(report))
     cm["preset"] = presets_kept
     
     # STEP 8: Delete groups
     print(f"\n[Step 8] Deleting groups from 'group' array...")
-    groups_kept = []
+    report = []
     for group in groups:
         group_id = group.get("id")
         if group_id in groups_to_delete:
             stats["groups_deleted"].append(group_id)
-            print(f"  Deleted group: {group_id} (mode: {group.get('mode', 'Unknown')})")
-        else:
-            groups_kept.append(group)
-    cm["group"] = groups_kept
+            report.append(f"  Deleted group: {group_id} (mode: {group.get('mode', 'Unknown')})")
+    if report:
+        print("\n".join(report))
+    cm["group"] = [group for group in groups if group.get("id") not in groups_to_delete]
     
     # STEP 9: Remove group_source_bindings that reference deleted groups
     print(f"\n[Step 9] Removing orphaned group_source_bindings from remaining presets...")
-    for preset in cm["preset"]:
+    report = []
+    for preset in presets_kept:
         gsb = preset.get("group_source_bindings", {})
-        keys_to_remove = [k for k in gsb.keys() if k in groups_to_delete]
+        # Most presets reference no deleted group; a set check skips them
+        if groups_to_delete.isdisjoint(gsb):
+            continue
+        # Removed in the preset's own order so the report stays stable
+        keys_to_remove = [k for k in gsb if k in groups_to_delete]
         for key in keys_to_remove:
             gsb.pop(key)
             stats["group_bindings_removed"] += 1
-            print(f"  Removed binding for group {key} from preset {preset.get('name')}")
+            report.append(f"  Removed binding for group {key} from preset {preset.get('name')}")
+    if report:
+        print("\n".join(report))
     
     # NOTE: We intentionally do NOT renumber preset[].id values or group[].id values.
     # Only the runtime IDs in controller_action commands need to be updated.
     # The preset and group IDs in the JSON structure are left as-is.
     
-    # Controller_action ID updates are done in the caller via string replacement
+    # Controller_action ID updates are done in the caller
     # We return the id_mapping for that purpose
     
     return layout_data, {"stats": stats, "id_mapping": id_mapping, "old_runtime_ids": old_runtime_ids, "new_runtime_ids": new_runtime_ids}
@@ -318,20 +402,32 @@ def delete_action_set_complete(layout_data: Dict[str, Any], target_preset_id: st
 
 def main():
     """Main function to handle command line arguments and execute the deletion."""
-    if len(sys.argv) != 3:
-        print("Usage: python delete_action_set_complete.py <json_file> <preset_id>")
-        print("\nExample:")
-        print("  python delete_action_set_complete.py 'neptune/universal-layout-default__hold-gyro__latest.json' 'Preset_1000014'")
-        print("\nThis will delete:")
-        print("  - The action set (Preset_1000014)")
-        print("  - All action layers with parent_set_name = Preset_1000014")
-        print("  - All preset entries for the above")
-        print("  - All groups referenced by those presets")
-        print("  - Update all controller_action runtime IDs")
-        sys.exit(1)
-    
-    json_file = sys.argv[1]
-    preset_id = sys.argv[2]
+    parser = argparse.ArgumentParser(
+        description="Delete an action set and all its associations from a Steam Input layout file",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=(
+            "Example:\n"
+            "  python delete_action_set_complete.py 'neptune/universal-layout-default__hold-gyro__latest.json' 'Preset_1000014'\n"
+            "\n"
+            "This will delete:\n"
+            "  - The action set (Preset_1000014)\n"
+            "  - All action layers with parent_set_name = Preset_1000014\n"
+            "  - All preset entries for the above\n"
+            "  - All groups referenced by those presets\n"
+            "  - Update all controller_action runtime IDs"
+        )
+    )
+    parser.add_argument("json_file", help="Layout JSON file to modify in place")
+    parser.add_argument("preset_id", help="ID of the action set to delete (e.g., Preset_1000014)")
+    parser.add_argument(
+        "--verbose", "-v",
+        action="store_true",
+        help="List the runtime ID replacements per command, not just the total"
+    )
+    
+    args = parser.parse_args()
+    json_file = args.json_file
+    preset_id = args.preset_id
     
     # Validate file exists
     if not os.path.exists(json_file):
@@ -347,31 +443,31 @@ def main():
         print("Error: Invalid layout file. Expected 'controller_mappings' at root level.")
         sys.exit(1)
     
-    # Create backup
+    # Create backup as a byte-for-byte copy of the original file
     backup_file = json_file.replace('.json', f'_backup_before_delete_{preset_id}.json')
     print(f"Creating backup: {backup_file}")
-    save_json_file(backup_file, layout_data)
+    try:
+        shutil.copyfile(json_file, backup_file)
+    except OSError as e:
+        print(f"Error creating backup: {e}")
+        sys.exit(1)
     
     # Perform the deletion
     updated_layout, deletion_info = delete_action_set_complete(layout_data, preset_id)
     
-    # Convert to string for ID replacement
-    print(f"\n[Step 10] Updating controller_action runtime IDs (two-pass)...")
-    json_str = json.dumps(updated_layout, indent='\t', ensure_ascii=False)
-    
-    # Update controller_action IDs
+    # Update controller_action IDs in place
+    print(f"\n[Step 10] Updating controller_action runtime IDs...")
     id_mapping = deletion_info["id_mapping"]
     if id_mapping:
-        json_str = update_controller_action_ids_two_pass(json_str, id_mapping)
+        deletion_info["stats"]["controller_action_ids_updated"] = update_controller_action_ids(
+            updated_layout, id_mapping, args.verbose
+        )
     else:
         print("  No runtime ID updates needed.")
     
-    # Parse back to dict and save
-    final_layout = json.loads(json_str, object_pairs_hook=OrderedDict)
-    
     # Save updated layout
     print(f"\n[Step 11] Saving updated layout...")
-    save_json_file(json_file, final_layout)
+    save_json_file(json_file, updated_layout)
     
     # Print summary
     stats = deletion_info["stats"]
@@ -379,17 +475,17 @@ def main():
     print("DELETION SUMMARY")
     print(f"{'='*60}")
     print(f"Action Set Deleted: {stats['action_set_deleted']}")
-    print(f"Layers Deleted: {len(stats['layers_deleted'])}")
-    for layer in stats['layers_deleted']:
-        print(f"  - {layer['id']} ('{layer['title']}')")
+    print("\n".join([f"Layers Deleted: {len(stats['layers_deleted'])}"] + [
+        f"  - {layer['id']} ('{layer['title']}')" for layer in stats['layers_deleted']
+    ]))
     print(f"Presets Deleted: {len(stats['presets_deleted'])}")
     print(f"Groups Deleted: {len(stats['groups_deleted'])}")
     print(f"Group Bindings Removed: {stats['group_bindings_removed']}")
     print(f"Runtime IDs Remapped: {len(id_mapping)}")
     if id_mapping:
-        print("  Old -> New:")
-        for old_id, new_id in sorted(id_mapping.items()):
-            print(f"    {old_id} -> {new_id}")
+        print("\n".join(["  Old -> New:"] + [
+            f"    {old_id} -> {new_id}" for old_id, new_id in sorted(id_mapping.items())
+        ]))
     
     print(f"\nBackup saved to: {backup_file}")
     print(f"Updated layout saved to: {json_file}")
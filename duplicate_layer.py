@@ -27,15 +27,31 @@ import sys
 import os
 import re
 import argparse
-from collections import OrderedDict
+import copy
+import shutil
+from itertools import chain
 from typing import Dict, Any, List, Tuple, Set
 
+try:
+    import orjson  # Optional: faster parsing; output is still written by json
+except ImportError:
+    orjson = None
+
+# Encoder for saved layouts, built once instead of on every json.dumps call
+JSON_ENCODER = json.JSONEncoder(indent='\t', ensure_ascii=False)
+
 
 def load_json_file(file_path: str) -> Dict[str, Any]:
-    """Load and parse a JSON file, preserving key order."""
+    """
+    Load and parse a JSON file; plain dicts keep the file's key order.
+    
+    Parses with orjson when it is installed (its JSONDecodeError subclasses
+    json's), otherwise with the standard library.
+    """
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            return json.load(f, object_pairs_hook=OrderedDict)
+        with open(file_path, 'rb') as f:
+            content = f.read()
+        return orjson.loads(content) if orjson is not None else json.loads(content)
     except FileNotFoundError:
         print(f"Error: File '{file_path}' not found.")
         sys.exit(1)
@@ -47,77 +63,87 @@ def load_json_file(file_path: str) -> Dict[str, Any]:
 def save_json_file(file_path: str, data: Dict[str, Any]) -> None:
     """Save data to a JSON file with proper formatting."""
     try:
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent='\t', ensure_ascii=False)
+        # Serialize up front so the file is written in one call rather than
+        # the many small chunks json.dump streams out
+        payload = JSON_ENCODER.encode(data).encode('utf-8')
+        # Written as bytes in binary mode: the payload is encoded once, and a
+        # single write this large goes straight past the file buffer
+        with open(file_path, 'wb') as f:
+            f.write(payload)
         print(f"Successfully saved to '{file_path}'")
     except Exception as e:
         print(f"Error saving file: {e}")
         sys.exit(1)
 
 
+def id_number(value: Any) -> int:
+    """
+    Get the number an ID holds, or 0 if it isn't a plain non-negative number.
+    
+    Checked up front rather than by catching int()'s ValueError, so the max
+    helpers below can feed it straight to max() in a generator.
+    """
+    if type(value) is str:
+        return int(value) if value.isdecimal() else 0
+    if type(value) is int and value > 0:
+        return value
+    return 0
+
+
 def find_max_preset_id(actions: Dict, action_layers: Dict) -> int:
     """Find the maximum Preset_XXXXXXX number used."""
-    max_id = 0
-    for key in list(actions.keys()) + list(action_layers.keys()):
-        if key.startswith("Preset_"):
-            try:
-                num = int(key.split("_")[1])
-                max_id = max(max_id, num)
-            except (IndexError, ValueError):
-                pass
-    return max_id
-
-
-def find_max_group_id(groups: List[Dict]) -> int:
-    """Find the maximum group ID used."""
-    max_id = 0
-    for group in groups:
-        try:
-            group_id = int(group.get("id", 0))
-            max_id = max(max_id, group_id)
-        except ValueError:
-            pass
-    return max_id
+    return max(
+        (
+            id_number(key.split("_")[1])
+            for key in chain(actions.keys(), action_layers.keys())
+            if key.startswith("Preset_")
+        ),
+        default=0
+    )
+
+
+def find_max_group_id(group_by_id: Dict[Any, Dict]) -> int:
+    """
+    Find the maximum group ID used.
+    
+    Takes the index from index_groups_by_id rather than the group list, so
+    each distinct ID is checked once and the groups aren't walked again.
+    """
+    return max((id_number(group_id) for group_id in group_by_id), default=0)
 
 
 def find_max_preset_array_id(presets: List[Dict]) -> int:
     """Find the maximum preset array id (the 'id' field in preset entries)."""
-    max_id = 0
-    for preset in presets:
-        try:
-            preset_id = int(preset.get("id", 0))
-            max_id = max(max_id, preset_id)
-        except ValueError:
-            pass
-    return max_id
+    return max((id_number(preset.get("id", 0)) for preset in presets), default=0)
 
 
 def deep_copy_ordered(obj: Any) -> Any:
-    """Deep copy an object while preserving OrderedDict structure."""
-    if isinstance(obj, OrderedDict):
-        return OrderedDict((k, deep_copy_ordered(v)) for k, v in obj.items())
-    elif isinstance(obj, dict):
-        return {k: deep_copy_ordered(v) for k, v in obj.items()}
-    elif isinstance(obj, list):
-        return [deep_copy_ordered(item) for item in obj]
-    else:
-        return obj
-
-
-def get_groups_for_preset(presets: List[Dict], preset_name: str) -> Dict[str, str]:
-    """Get the group_source_bindings for a given preset name."""
+    """
+    Deep copy a parsed JSON object, preserving key order.
+    
+    With orjson installed the object is round-tripped through its C
+    serializer, which is much faster than walking it in Python; otherwise
+    copy.deepcopy is used.
+    """
+    if orjson is not None:
+        return orjson.loads(orjson.dumps(obj))
+    return copy.deepcopy(obj)
+
+
+def index_presets_by_name(presets: List[Dict]) -> Dict[Any, Dict]:
+    """Map each preset name to the first preset entry with that name."""
+    preset_by_name = {}
     for preset in presets:
-        if preset.get("name") == preset_name:
-            return preset.get("group_source_bindings", {})
-    return {}
+        preset_by_name.setdefault(preset.get("name"), preset)
+    return preset_by_name
 
 
-def find_group_by_id(groups: List[Dict], group_id: str) -> Dict[str, Any]:
-    """Find a group by its ID."""
+def index_groups_by_id(groups: List[Dict]) -> Dict[Any, Dict]:
+    """Map each group ID to the first group with that ID."""
+    group_by_id = {}
     for group in groups:
-        if group.get("id") == group_id:
-            return group
-    return None
+        group_by_id.setdefault(group.get("id"), group)
+    return group_by_id
 
 
 def calculate_runtime_ids(actions: Dict, action_layers: Dict) -> Dict[str, int]:
@@ -125,18 +151,10 @@ def calculate_runtime_ids(actions: Dict, action_layers: Dict) -> Dict[str, int]:
     Calculate runtime IDs for all action sets and layers based on their order.
     Action sets come first (starting at 1), then action layers.
     """
-    runtime_ids = {}
-    position = 1
-    
-    for action_key in actions.keys():
-        runtime_ids[action_key] = position
-        position += 1
-    
-    for layer_key in action_layers.keys():
-        runtime_ids[layer_key] = position
-        position += 1
-    
-    return runtime_ids
+    return {
+        preset_id: position
+        for position, preset_id in enumerate(chain(actions.keys(), action_layers.keys()), start=1)
+    }
 
 
 def duplicate_layer(
@@ -147,6 +165,9 @@ def duplicate_layer(
     """
     Duplicate an action layer with all its children relationships.
     
+    layout_data is modified in place, not copied; the same object is
+    returned. main backs up the file on disk before calling this.
+    
     Args:
         layout_data: The parsed JSON layout data
         source_layer_id: The Preset ID of the layer to duplicate (e.g., "Preset_1000006")
@@ -160,8 +181,8 @@ def duplicate_layer(
     print(f"{'='*60}")
     
     cm = layout_data.get("controller_mappings", {})
-    actions = cm.get("actions", OrderedDict())
-    action_layers = cm.get("action_layers", OrderedDict())
+    actions = cm.get("actions", {})
+    action_layers = cm.get("action_layers", {})
     presets = cm.get("preset", [])
     groups = cm.get("group", [])
     
@@ -190,46 +211,54 @@ def duplicate_layer(
         new_title = f"{source_title} (Copy)"
     print(f"New layer title: '{new_title}'")
     
+    # Index presets and groups once instead of scanning them per lookup
+    preset_by_name = index_presets_by_name(presets)
+    group_by_id = index_groups_by_id(groups)
+    
     # Get source preset's group_source_bindings
-    source_gsb = get_groups_for_preset(presets, source_layer_id)
+    source_preset = preset_by_name.get(source_layer_id)
+    source_gsb = source_preset.get("group_source_bindings", {}) if source_preset is not None else {}
     if not source_gsb:
         print(f"Warning: No group_source_bindings found for {source_layer_id}")
     print(f"\n[Step 2] Found {len(source_gsb)} groups to duplicate")
     
     # Generate new group IDs and create mapping
-    max_group_id = find_max_group_id(groups)
+    max_group_id = find_max_group_id(group_by_id)
     group_id_mapping = {}  # old_id -> new_id
     
     print(f"\n[Step 3] Duplicating groups...")
     new_groups = []
+    report = []  # Printed in one call once every group is copied
     for old_group_id in source_gsb.keys():
-        new_group_id = str(max_group_id + 1)
         max_group_id += 1
+        new_group_id = str(max_group_id)
         group_id_mapping[old_group_id] = new_group_id
         
         # Find and copy the original group
-        original_group = find_group_by_id(groups, old_group_id)
+        original_group = group_by_id.get(old_group_id)
         if original_group:
             new_group = deep_copy_ordered(original_group)
             new_group["id"] = new_group_id
             new_groups.append(new_group)
-            print(f"  Group {old_group_id} -> {new_group_id} (mode: {original_group.get('mode', 'Unknown')})")
+            report.append(f"  Group {old_group_id} -> {new_group_id} (mode: {original_group.get('mode', 'Unknown')})")
         else:
-            print(f"  Warning: Group {old_group_id} not found in groups array")
+            report.append(f"  Warning: Group {old_group_id} not found in groups array")
+    if report:
+        print("\n".join(report))
     
     # Create new group_source_bindings with updated group IDs
-    new_gsb = OrderedDict()
-    for old_id, binding_value in source_gsb.items():
-        new_id = group_id_mapping.get(old_id, old_id)
-        new_gsb[new_id] = binding_value
+    new_gsb = {
+        group_id_mapping.get(old_id, old_id): binding_value
+        for old_id, binding_value in source_gsb.items()
+    }
     
     # Create new preset entry
     max_preset_array_id = find_max_preset_array_id(presets)
-    new_preset_entry = OrderedDict([
-        ("id", str(max_preset_array_id + 1)),
-        ("name", new_preset_id),
-        ("group_source_bindings", new_gsb)
-    ])
+    new_preset_entry = {
+        "id": str(max_preset_array_id + 1),
+        "name": new_preset_id,
+        "group_source_bindings": new_gsb
+    }
     print(f"\n[Step 4] Created new preset entry with id: {new_preset_entry['id']}")
     
     # Create new layer definition (copy from source)
@@ -278,8 +307,8 @@ def duplicate_layer(
 def list_layers(layout_data: Dict[str, Any]) -> None:
     """List all available action layers."""
     cm = layout_data.get("controller_mappings", {})
-    actions = cm.get("actions", OrderedDict())
-    action_layers = cm.get("action_layers", OrderedDict())
+    actions = cm.get("actions", {})
+    action_layers = cm.get("action_layers", {})
     
     runtime_ids = calculate_runtime_ids(actions, action_layers)
     
@@ -288,6 +317,7 @@ def list_layers(layout_data: Dict[str, Any]) -> None:
     print(f"{'Preset ID':<20} {'Runtime ID':<12} {'Title':<30} {'Parent Set'}")
     print("-" * 80)
     
+    rows = []
     for layer_id, layer_data in action_layers.items():
         title = layer_data.get("title", "Unknown")[:28]
         parent = layer_data.get("parent_set_name", "")
@@ -295,7 +325,9 @@ def list_layers(layout_data: Dict[str, Any]) -> None:
         if parent in actions:
             parent_title = actions[parent].get("title", "")
         runtime_id = runtime_ids.get(layer_id, "?")
-        print(f"{layer_id:<20} {runtime_id:<12} {title:<30} {parent_title}")
+        rows.append(f"{layer_id:<20} {runtime_id:<12} {title:<30} {parent_title}")
+    if rows:
+        print("\n".join(rows))
 
 
 def main():
@@ -351,11 +383,16 @@ def main():
         parser.print_help()
         sys.exit(1)
     
-    # Create backup (unless disabled or outputting to different file)
+    # Create backup (unless disabled or outputting to different file) as a
+    # byte-for-byte copy of the original file
     if not args.no_backup and not args.output:
         backup_file = args.json_file.replace('.json', '_backup_before_duplicate.json')
         print(f"Creating backup: {backup_file}")
-        save_json_file(backup_file, layout_data)
+        try:
+            shutil.copyfile(args.json_file, backup_file)
+        except OSError as e:
+            print(f"Error creating backup: {e}")
+            sys.exit(1)
     
     # Perform the duplication
     updated_layout, info = duplicate_layer(
@@ -382,9 +419,9 @@ def main():
     print(f"New Runtime ID: {info['new_runtime_id']}")
     print(f"Groups Duplicated: {info['groups_duplicated']}")
     print(f"")
-    print(f"Group ID Mapping (old -> new):")
-    for old_id, new_id in info['group_id_mapping'].items():
-        print(f"  {old_id} -> {new_id}")
+    print("\n".join(["Group ID Mapping (old -> new):"] + [
+        f"  {old_id} -> {new_id}" for old_id, new_id in info['group_id_mapping'].items()
+    ]))
     print(f"\nSaved to: {output_path}")
     print(f"\nOperation completed successfully!")
 
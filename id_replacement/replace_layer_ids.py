@@ -1,89 +1,108 @@
 #!/usr/bin/env python3
 """
 Script to replace old layer IDs with new IDs in Steam Controller layout JSON files.
-Uses a two-pass approach to safely handle ID replacements.
+Rewrites every layer ID in a single pass over the file.
 """
 
 import json
 import re
 import os
+from collections import Counter
 from pathlib import Path
 
-def load_id_mapping(mapping_file):
-    """Load the old to new ID mapping from JSON file."""
-    with open(mapping_file, 'r') as f:
-        return json.load(f)
+try:
+    import orjson  # Optional: faster parsing of the mapping file
+except ImportError:
+    orjson = None
+
+# controller_action (add_layer|remove_layer|hold_layer) <id> <rest>, compiled
+# once at import and matched against the file's raw bytes, since the bindings
+# and layer IDs are plain ASCII. Steam writes these bindings with single
+# spaces, and the commands are listed most common first. Only the ID is
+# captured; the two trailing parameters are checked but left out of the match.
+LAYER_ID_COMMAND_RE = re.compile(
+    rb'controller_action (?:remove_layer|add_layer|hold_layer) (\d+)(?= \d+ \d+)'
+)
 
-def create_reverse_mapping(id_mapping):
-    """Create a reverse mapping from old_id to new_id for quick lookup."""
-    reverse_map = {}
-    for preset_id, data in id_mapping.items():
-        if 'old_id' in data and 'new_id' in data:
-            reverse_map[data['old_id']] = data['new_id']
-    return reverse_map
+# Every layer command contains this; text without it has nothing to rewrite
+LAYER_COMMAND_MARKER = b"_layer "
 
-def first_pass_replace(content, reverse_mapping):
+def load_id_mapping(mapping_file):
     """
-    First pass: Replace old_id with old_id + "_" + new_id
-    This ensures we can safely identify and replace all instances.
+    Load the ID mapping file as a reverse mapping from old_id to new_id.
+
+    Only entries with both IDs are kept; the per-preset records are not
+    needed once the IDs have been read out. Parses with orjson when it is
+    installed, otherwise with the standard library.
     """
-    print("Starting first pass: replacing old_id with old_id_new_id format...")
-    
-    # Pattern to match controller_action commands with layer IDs
-    # Matches: controller_action (add_layer|remove_layer|hold_layer) <id> <rest>
-    pattern = r'(controller_action\s+(?:add_layer|remove_layer|hold_layer)\s+)(\d+)(\s+\d+\s+\d+[,\s]*)'
-    
-    def replace_func(match):
-        action_part = match.group(1)  # controller_action add_layer/remove_layer/hold_layer
-        old_id = int(match.group(2))  # the layer ID
-        rest = match.group(3)         # remaining parameters
-        
-        if old_id in reverse_mapping:
-            new_id = reverse_mapping[old_id]
-            # Replace with old_id_new_id format
-            replacement = f"{action_part}{old_id}_{new_id}{rest}"
-            print(f"  Replacing: {old_id} -> {old_id}_{new_id}")
-            return replacement
-        else:
-            # No mapping found, keep as is
-            print(f"  No mapping found for ID: {old_id}, keeping unchanged")
-            return match.group(0)
-    
-    # Apply the replacement
-    modified_content = re.sub(pattern, replace_func, content)
-    
-    print(f"First pass completed.")
-    return modified_content
+    with open(mapping_file, 'rb') as f:
+        content = f.read()
+    id_mapping = orjson.loads(content) if orjson is not None else json.loads(content)
+    return {
+        data['old_id']: data['new_id']
+        for data in id_mapping.values()
+        if 'old_id' in data and 'new_id' in data
+    }
 
-def second_pass_cleanup(content):
+def apply_id_mapping(content, reverse_mapping):
     """
-    Second pass: Remove the prepended old_id + "_" part, keeping only the new_id
+    Replace each mapped old_id with its new_id in a single pass.
+
+    Every ID is rewritten from the original text, so a new ID that equals
+    another mapping's old ID is never remapped a second time.
+
+    Returns the rewritten content as a list of chunks in file order, so it
+    can be written out without first joining it into one string.
     """
-    print("Starting second pass: removing prepended old_id_ prefix...")
-    
-    # Pattern to match the old_id_new_id format we created in first pass
-    # Matches: controller_action (add_layer|remove_layer|hold_layer) <old_id>_<new_id> <rest>
-    pattern = r'(controller_action\s+(?:add_layer|remove_layer|hold_layer)\s+)(\d+)_(\d+)(\s+\d+\s+\d+[,\s]*)'
-    
-    def replace_func(match):
-        action_part = match.group(1)  # controller_action add_layer/remove_layer/hold_layer
-        old_id = match.group(2)       # the old ID part
-        new_id = match.group(3)       # the new ID part
-        rest = match.group(4)         # remaining parameters
-        
-        # Keep only the new_id
-        replacement = f"{action_part}{new_id}{rest}"
-        print(f"  Final replacement: {old_id}_{new_id} -> {new_id}")
-        return replacement
-    
-    # Apply the replacement
-    modified_content = re.sub(pattern, replace_func, content)
+    print("Applying ID mapping: replacing old_id with new_id...")
+    
+    # Keyed and valued by the ID bytes, so a match needs no decode or int()
+    id_replacements = {
+        str(old_id).encode('ascii'): str(new_id).encode('ascii')
+        for old_id, new_id in reverse_mapping.items()
+    }
+    # Only IDs whose text actually changes need to be cut out of the content;
+    # unmapped IDs and ones mapped to themselves stay inside the copied slices
+    id_rewrites = {old_id: new_id for old_id, new_id in id_replacements.items() if old_id != new_id}
+    matched_ids = []
+    
+    # Only the ID span of each match is rewritten; the text around it is
+    # carried over as slices
+    parts = []
+    last_end = 0
+    # A substring search rules out files with no layer commands far more
+    # cheaply than running the regex over them
+    matches = LAYER_ID_COMMAND_RE.finditer(content) if LAYER_COMMAND_MARKER in content else ()
+    for match in matches:
+        old_id = match.group(1)
+        matched_ids.append(old_id)
+        new_id = id_rewrites.get(old_id)
+        if new_id is not None:
+            id_start, id_end = match.span(1)
+            parts.append(content[last_end:id_start])
+            parts.append(new_id)
+            last_end = id_end
+    parts.append(content[last_end:])
+    
+    # One line per distinct ID, most frequent first, written in one call
+    # rather than once per match
+    replacements_made = 0
+    report_lines = []
+    for old_id, count in Counter(matched_ids).most_common():
+        new_id = id_replacements.get(old_id)
+        if new_id is None:
+            report_lines.append(f"  No mapping found for ID: {old_id.decode()} ({count}x), keeping unchanged")
+        else:
+            report_lines.append(f"  Replacing: {old_id.decode()} -> {new_id.decode()} ({count}x)")
+            replacements_made += count
+    if report_lines:
+        print("\n".join(report_lines))
     
-    print(f"Second pass completed.")
-    return modified_content
+    print(f"ID mapping applied. {replacements_made} replacements made.")
+    return parts
 
 def process_json_file(input_file, output_file, id_mapping_file):
-    """Process the JSON file through both passes."""
+    """Process the JSON file, replacing mapped layer IDs."""
     print(f"Processing file: {input_file}")
     print(f"Using ID mapping from: {id_mapping_file}")
     print(f"Output will be saved to: {output_file}")
@@ -91,8 +110,7 @@ def process_json_file(input_file, output_file, id_mapping_file):
     
     # Load the ID mapping
     try:
-        id_mapping = load_id_mapping(id_mapping_file)
-        reverse_mapping = create_reverse_mapping(id_mapping)
+        reverse_mapping = load_id_mapping(id_mapping_file)
         print(f"Loaded {len(reverse_mapping)} ID mappings")
     except Exception as e:
         print(f"Error loading ID mapping file: {e}")
@@ -100,23 +118,20 @@ def process_json_file(input_file, output_file, id_mapping_file):
     
     # Read the input file
     try:
-        with open(input_file, 'r', encoding='utf-8') as f:
+        with open(input_file, 'rb') as f:
             content = f.read()
-        print(f"Successfully read input file ({len(content)} characters)")
+        print(f"Successfully read input file ({len(content)} bytes)")
     except Exception as e:
         print(f"Error reading input file: {e}")
         return False
     
-    # First pass: Replace with old_id_new_id format
-    content = first_pass_replace(content, reverse_mapping)
-    
-    # Second pass: Remove the prepended old_id_ part
-    content = second_pass_cleanup(content)
+    # Replace every mapped ID in one pass
+    parts = apply_id_mapping(content, reverse_mapping)
     
     # Write the output file
     try:
-        with open(output_file, 'w', encoding='utf-8') as f:
-            f.write(content)
+        with open(output_file, 'wb') as f:
+            f.writelines(parts)
         print(f"Successfully wrote output file: {output_file}")
     except Exception as e:
         print(f"Error writing output file: {e}")
@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 """
 Flexible script to replace old layer IDs with new IDs in Steam Controller layout JSON files.
-Uses a two-pass approach to safely handle ID replacements.
+Rewrites every layer ID in a single pass over the file.
 Accepts command-line arguments for file paths.
 """
 
@@ -10,128 +10,151 @@ import re
 import os
 import argparse
 import sys
+from collections import Counter
 from pathlib import Path
 
+try:
+    import orjson  # Optional: faster parsing of the mapping file
+except ImportError:
+    orjson = None
+
+# controller_action (add_layer|remove_layer|hold_layer) <id> <rest>, compiled
+# once at import and matched against the file's raw bytes, since the bindings
+# and layer IDs are plain ASCII. Steam writes these bindings with single
+# spaces, and the commands are listed most common first. Only the ID is
+# captured; the two trailing parameters are checked but left out of the match.
+LAYER_ID_COMMAND_RE = re.compile(
+    rb'controller_action (?:remove_layer|add_layer|hold_layer) (\d+)(?= \d+ \d+)'
+)
+
+# Every layer command contains this; text without it has nothing to rewrite
+LAYER_COMMAND_MARKER = b"_layer "
+
 def load_id_mapping(mapping_file):
-    """Load the old to new ID mapping from JSON file."""
+    """
+    Load the ID mapping file as a reverse mapping from old_id to new_id.
+
+    Both IDs are returned as their ASCII bytes, ready to be matched against
+    layout content, so the table is built once however many files use it.
+    Only entries with both IDs are kept; the per-preset records are not
+    needed once the IDs have been read out. Returns None if the file can't
+    be loaded.
+
+    Parses with orjson when it is installed (its JSONDecodeError subclasses
+    json's), otherwise with the standard library.
+    """
     try:
-        with open(mapping_file, 'r') as f:
-            return json.load(f)
+        with open(mapping_file, 'rb') as f:
+            content = f.read()
+        id_mapping = orjson.loads(content) if orjson is not None else json.loads(content)
     except FileNotFoundError:
         print(f"Error: ID mapping file not found: {mapping_file}")
         return None
     except json.JSONDecodeError as e:
         print(f"Error: Invalid JSON in ID mapping file: {e}")
         return None
+    return {
+        str(data['old_id']).encode('ascii'): str(data['new_id']).encode('ascii')
+        for data in id_mapping.values()
+        if 'old_id' in data and 'new_id' in data
+    }
 
-def create_reverse_mapping(id_mapping):
-    """Create a reverse mapping from old_id to new_id for quick lookup."""
-    reverse_map = {}
-    for preset_id, data in id_mapping.items():
-        if 'old_id' in data and 'new_id' in data:
-            reverse_map[data['old_id']] = data['new_id']
-    return reverse_map
-
-def first_pass_replace(content, reverse_mapping):
+def apply_id_mapping(content, id_replacements, verbose=False, dry_run=False):
     """
-    First pass: Replace old_id with old_id + "_" + new_id
-    This ensures we can safely identify and replace all instances.
+    Replace each mapped old_id with its new_id in a single pass, using the
+    bytes table from load_id_mapping.
+
+    Every ID is rewritten from the original text, so a new ID that equals
+    another mapping's old ID is never remapped a second time.
+
+    Returns the rewritten content as a list of chunks in file order, so it
+    can be written out without first joining it into one string.
+
+    Replacements are summarized per ID; verbose also lists every match in
+    file order. A dry run only scans and reports, returning the content as
+    a single unsliced chunk.
     """
-    print("Starting first pass: replacing old_id with old_id_new_id format...")
+    print("Applying ID mapping: replacing old_id with new_id...")
     
-    # Pattern to match controller_action commands with layer IDs
-    # Matches: controller_action (add_layer|remove_layer|hold_layer) <id> <rest>
-    pattern = r'(controller_action\s+(?:add_layer|remove_layer|hold_layer)\s+)(\d+)(\s+\d+\s+\d+[,\s]*)'
+    # Only IDs whose text actually changes need to be cut out of the content;
+    # unmapped IDs and ones mapped to themselves stay inside the copied slices.
+    # A dry run cuts out nothing, since its output is never written.
+    id_rewrites = {} if dry_run else {
+        old_id: new_id for old_id, new_id in id_replacements.items() if old_id != new_id
+    }
+    matched_ids = []
     
-    replacements_made = 0
+    # Only the ID span of each match is rewritten; the text around it is
+    # carried over as slices
+    parts = []
+    last_end = 0
+    # A substring search rules out files with no layer commands far more
+    # cheaply than running the regex over them
+    matches = LAYER_ID_COMMAND_RE.finditer(content) if LAYER_COMMAND_MARKER in content else ()
+    for match in matches:
+        old_id = match.group(1)
+        matched_ids.append(old_id)
+        new_id = id_rewrites.get(old_id)
+        if new_id is not None:
+            id_start, id_end = match.span(1)
+            parts.append(content[last_end:id_start])
+            parts.append(new_id)
+            last_end = id_end
+    parts.append(content[last_end:])
     
-    def replace_func(match):
-        nonlocal replacements_made
-        action_part = match.group(1)  # controller_action add_layer/remove_layer/hold_layer
-        old_id = int(match.group(2))  # the layer ID
-        rest = match.group(3)         # remaining parameters
-        
-        if old_id in reverse_mapping:
-            new_id = reverse_mapping[old_id]
-            # Replace with old_id_new_id format
-            replacement = f"{action_part}{old_id}_{new_id}{rest}"
-            print(f"  Replacing: {old_id} -> {old_id}_{new_id}")
-            replacements_made += 1
-            return replacement
+    # One line per distinct ID, most frequent first, written in one call
+    # rather than once per match
+    replacements_made = 0
+    report_lines = []
+    for old_id, count in Counter(matched_ids).most_common():
+        new_id = id_replacements.get(old_id)
+        if new_id is None:
+            report_lines.append(f"  No mapping found for ID: {old_id.decode()} ({count}x), keeping unchanged")
         else:
-            # No mapping found, keep as is
-            print(f"  No mapping found for ID: {old_id}, keeping unchanged")
-            return match.group(0)
+            report_lines.append(f"  Replacing: {old_id.decode()} -> {new_id.decode()} ({count}x)")
+            replacements_made += count
+    if verbose and matched_ids:
+        print("\n".join(
+            f"  Replacing: {old_id.decode()} -> {id_replacements[old_id].decode()}"
+            if old_id in id_replacements else
+            f"  No mapping found for ID: {old_id.decode()}, keeping unchanged"
+            for old_id in matched_ids
+        ))
+    if report_lines:
+        print("\n".join(report_lines))
     
-    # Apply the replacement
-    modified_content = re.sub(pattern, replace_func, content)
-    
-    print(f"First pass completed. {replacements_made} replacements made.")
-    return modified_content
+    print(f"ID mapping applied. {replacements_made} replacements made.")
+    return parts
 
-def second_pass_cleanup(content):
-    """
-    Second pass: Remove the prepended old_id + "_" part, keeping only the new_id
+def process_json_file(input_file, output_file, id_replacements, dry_run=False, verbose=False,
+                      overwrite=True):
     """
-    print("Starting second pass: removing prepended old_id_ prefix...")
-    
-    # Pattern to match the old_id_new_id format we created in first pass
-    # Matches: controller_action (add_layer|remove_layer|hold_layer) <old_id>_<new_id> <rest>
-    pattern = r'(controller_action\s+(?:add_layer|remove_layer|hold_layer)\s+)(\d+)_(\d+)(\s+\d+\s+\d+[,\s]*)'
-    
-    replacements_made = 0
-    
-    def replace_func(match):
-        nonlocal replacements_made
-        action_part = match.group(1)  # controller_action add_layer/remove_layer/hold_layer
-        old_id = match.group(2)       # the old ID part
-        new_id = match.group(3)       # the new ID part
-        rest = match.group(4)         # remaining parameters
-        
-        # Keep only the new_id
-        replacement = f"{action_part}{new_id}{rest}"
-        print(f"  Final replacement: {old_id}_{new_id} -> {new_id}")
-        replacements_made += 1
-        return replacement
-    
-    # Apply the replacement
-    modified_content = re.sub(pattern, replace_func, content)
-    
-    print(f"Second pass completed. {replacements_made} replacements made.")
-    return modified_content
+    Process the JSON file, replacing mapped layer IDs.
+
+    id_replacements is the table returned by load_id_mapping, loaded once
+    and shared by every file in a batch.
 
-def process_json_file(input_file, output_file, id_mapping_file, dry_run=False):
-    """Process the JSON file through both passes."""
+    Unless overwrite is set, the output file is created exclusively, so an
+    existing file is never replaced.
+    """
     print(f"Processing file: {input_file}")
-    print(f"Using ID mapping from: {id_mapping_file}")
     if dry_run:
         print("DRY RUN MODE - No files will be modified")
     else:
         print(f"Output will be saved to: {output_file}")
     print("-" * 60)
     
-    # Load the ID mapping
-    id_mapping = load_id_mapping(id_mapping_file)
-    if id_mapping is None:
-        return False
-    
-    reverse_mapping = create_reverse_mapping(id_mapping)
-    print(f"Loaded {len(reverse_mapping)} ID mappings")
-    
     # Read the input file
     try:
-        with open(input_file, 'r', encoding='utf-8') as f:
+        with open(input_file, 'rb') as f:
             content = f.read()
-        print(f"Successfully read input file ({len(content)} characters)")
+        print(f"Successfully read input file ({len(content)} bytes)")
     except Exception as e:
         print(f"Error reading input file: {e}")
         return False
     
-    # First pass: Replace with old_id_new_id format
-    content = first_pass_replace(content, reverse_mapping)
-    
-    # Second pass: Remove the prepended old_id_ part
-    content = second_pass_cleanup(content)
+    # Replace every mapped ID in one pass
+    parts = apply_id_mapping(content, id_replacements, verbose, dry_run)
     
     if dry_run:
         print("DRY RUN MODE - Skipping file write")
@@ -139,9 +162,13 @@ def process_json_file(input_file, output_file, id_mapping_file, dry_run=False):
     
     # Write the output file
     try:
-        with open(output_file, 'w', encoding='utf-8') as f:
-            f.write(content)
+        with open(output_file, 'wb' if overwrite else 'xb') as f:
+            f.writelines(parts)
         print(f"Successfully wrote output file: {output_file}")
+    except FileExistsError:
+        print(f"Error: Output file already exists: {output_file}")
+        print("Use --overwrite to allow overwriting, or specify a different output file with -o")
+        return False
     except Exception as e:
         print(f"Error writing output file: {e}")
         return False
@@ -168,13 +195,17 @@ Examples:
   
   # Process alternative layout file
   python3 replace_layer_ids_flexible.py -i "neptune/universal-layout-alternative  hold-gyro  latest.json"
+  
+  # Process several layouts with one mapping load (each gets its _updated copy)
+  python3 replace_layer_ids_flexible.py -i neptune/*.json
         """
     )
     
     parser.add_argument(
         '-i', '--input',
-        default="neptune/universal-layout-default  hold-gyro  latest.json",
-        help='Input JSON file to process (default: neptune/universal-layout-default  hold-gyro  latest.json)'
+        nargs='+',
+        default=["neptune/universal-layout-default  hold-gyro  latest.json"],
+        help='Input JSON file(s) to process (default: neptune/universal-layout-default  hold-gyro  latest.json)'
     )
     
     parser.add_argument(
@@ -185,7 +216,7 @@ Examples:
     
     parser.add_argument(
         '-o', '--output',
-        help='Output JSON file (default: input_filename_updated.json)'
+        help='Output JSON file, single input only (default: input_filename_updated.json)'
     )
     
     parser.add_argument(
@@ -200,42 +231,63 @@ Examples:
         help='Allow overwriting existing output file'
     )
     
-    args = parser.parse_args()
+    parser.add_argument(
+        '-v', '--verbose',
+        action='store_true',
+        help='List every replacement in file order, not just the per-ID summary'
+    )
     
-    # Set default output filename if not specified
-    if not args.output:
-        input_path = Path(args.input)
-        args.output = str(input_path.parent / f"{input_path.stem}_updated{input_path.suffix}")
+    args = parser.parse_args()
     
-    # Check if input files exist
-    if not os.path.exists(args.input):
-        print(f"Error: Input file not found: {args.input}")
+    if args.output and len(args.input) > 1:
+        print("Error: -o/--output can only be used with a single input file")
         sys.exit(1)
     
-    if not os.path.exists(args.mapping):
-        print(f"Error: ID mapping file not found: {args.mapping}")
-        sys.exit(1)
+    # Check if input files exist, one stat each
+    checks = [(path, "Input file") for path in args.input]
+    checks.append((args.mapping, "ID mapping file"))
+    for path, label in checks:
+        try:
+            os.stat(path)
+        except OSError:
+            print(f"Error: {label} not found: {path}")
+            sys.exit(1)
     
-    # Check if output file exists and handle overwrite
-    if os.path.exists(args.output) and not args.dry_run and not args.overwrite:
-        print(f"Error: Output file already exists: {args.output}")
-        print("Use --overwrite to allow overwriting, or specify a different output file with -o")
+    # Load the mapping once for the whole batch
+    print(f"Using ID mapping from: {args.mapping}")
+    id_replacements = load_id_mapping(args.mapping)
+    if id_replacements is None:
+        print(f"\n❌ Failed to load ID mapping from {args.mapping}")
         sys.exit(1)
+    print(f"Loaded {len(id_replacements)} ID mappings")
     
-    # Process the file
-    success = process_json_file(args.input, args.output, args.mapping, args.dry_run)
-    
-    if success:
-        if args.dry_run:
-            print(f"\n✅ DRY RUN completed for {args.input}")
-            print("Review the output above to see what would be changed.")
+    failed = False
+    for input_file in args.input:
+        # Set default output filename if not specified
+        output_file = args.output
+        if not output_file:
+            input_path = Path(input_file)
+            output_file = str(input_path.parent / f"{input_path.stem}_updated{input_path.suffix}")
+        
+        # An existing output file is refused when it is opened for writing,
+        # with no separate exists check beforehand
+        success = process_json_file(input_file, output_file, id_replacements, args.dry_run,
+                                    args.verbose, args.overwrite)
+        
+        if success:
+            if args.dry_run:
+                print(f"\n✅ DRY RUN completed for {input_file}")
+                print("Review the output above to see what would be changed.")
+            else:
+                print(f"\n✅ Successfully processed {input_file}")
+                print(f"📁 Updated file saved as: {output_file}")
+                print("\nYou can now review the changes and replace the original file if satisfied.")
         else:
-            print(f"\n✅ Successfully processed {args.input}")
-            print(f"📁 Updated file saved as: {args.output}")
-            print("\nYou can now review the changes and replace the original file if satisfied.")
-    else:
-        print(f"\n❌ Failed to process {args.input}")
+            print(f"\n❌ Failed to process {input_file}")
+            failed = True
+    
+    if failed:
         sys.exit(1)
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()